@@ -0,0 +1,196 @@
+"""
+Admission control - limit súbežných requestov podľa triedy endpointov
+Každá trieda (časovač, polling, katalóg, reporty, login) má vlastný limit
+a čas čakania vo fronte; nadbytočné requesty sa odmietnu s 429/503 a Retry-After,
+takže ťažké admin operácie nezaberú workerov a pripojenia pre hodinky.
+Účinok má tam, kde beží viac requestov naraz - v ASGI režime (Procfile). Záložný sync
+gunicorn s jedným vláknom vybavuje requesty po jednom a limity sa v ňom nikdy neuplatnia.
+"""
+
+import math
+import os
+import threading
+import time
+
+# trieda -> (max. súbežných, max. čakanie vo fronte v sekundách, max. čakajúcich)
+# Časovač z hodiniek má najvyšší limit a najdlhšie čakanie, reporty najnižšie.
+DEFAULT_CLASSES = {
+    'timer': (32, 5.0, 64),
+    'polling': (16, 1.0, 32),
+    'catalog': (16, 2.0, 32),
+    'login': (8, 2.0, 16),
+    'reports': (2, 0.5, 4),
+}
+
+# Endpointy Flask aplikácie podľa tried
+ROUTE_CLASSES = {
+    'start_timer': 'timer',
+    'stop_timer': 'timer',
+    'cancel_timer': 'timer',
+    'get_active_timer': 'polling',
+    'get_timer_history': 'polling',
+    'get_recent': 'polling',
+    'get_warehouse_live': 'polling',
+    'bootstrap': 'catalog',
+    'get_clients': 'catalog',
+    'search_clients': 'catalog',
+    'get_tasks': 'catalog',
+    'login': 'login',
+    'get_report': 'reports',
+    'sweep_stale_timers': 'reports',
+    'bulk_delete_time_records': 'reports',
+    'bulk_import': 'reports',
+}
+
+# Triedy s prednosťou - ostatné triedy spolu nesmú mať viac ako ADMISSION_SHARED_LIMIT
+# aktívnych requestov, zvyšok kapacity (pool ASYNC_DB_POOL_SIZE=16) ostáva časovaču.
+# 0 = bez spoločného limitu (len izolácia tried)
+PRIORITY_CLASSES = ('timer',)
+ADMISSION_SHARED_LIMIT = int(os.environ.get('ADMISSION_SHARED_LIMIT', 12))
+
+# Prepísanie limitov: ADMISSION_LIMITS="reports=1,timer=64"
+# a čakania: ADMISSION_QUEUE_TIMEOUTS="reports=0.2"
+ADMISSION_LIMITS = os.environ.get('ADMISSION_LIMITS', '')
+ADMISSION_QUEUE_TIMEOUTS = os.environ.get('ADMISSION_QUEUE_TIMEOUTS', '')
+
+
+def _parse_overrides(value, cast):
+    overrides = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, number = item.rsplit('=', 1)
+        overrides[name.strip()] = cast(number)
+    return overrides
+
+
+class RouteClass:
+    """Semafor triedy endpointov s ohraničenou frontou a metrikami"""
+
+    def __init__(self, name, limit, queue_timeout, max_queue, shared=None):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retry_after = max(1, math.ceil(queue_timeout * 2))
+
+        self._semaphore = threading.BoundedSemaphore(limit)
+        # Spoločný semafor tried bez prednosti (None = trieda s prednosťou)
+        self.shared = shared
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def try_acquire(self):
+        """Prijatie bez čakania (async cesta) - True ak je miesto voľné hneď"""
+        if not self._semaphore.acquire(blocking=False):
+            return False
+        if self.shared is not None and not self.shared.acquire(blocking=False):
+            self._semaphore.release()
+            return False
+
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+        return True
+
+    def acquire(self):
+        """Vráti None pri prijatí, inak HTTP status pre odmietnutie (429/503)"""
+        start = time.monotonic()
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.max_queue:
+                    self.rejected_queue_full += 1
+                    return 429
+                self.waiting += 1
+
+            acquired = self._semaphore.acquire(timeout=self.queue_timeout)
+            waited = time.monotonic() - start
+
+            with self._lock:
+                self.waiting -= 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                if not acquired:
+                    self.rejected_timeout += 1
+                    return 503
+
+        # Spoločná kapacita tried bez prednosti - čaká sa len zvyšok queue_timeout
+        if self.shared is not None and not self._acquire_shared(start):
+            self._semaphore.release()
+            with self._lock:
+                self.rejected_timeout += 1
+            return 503
+
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+        return None
+
+    def _acquire_shared(self, start):
+        if self.shared.acquire(blocking=False):
+            return True
+        remaining = self.queue_timeout - (time.monotonic() - start)
+        return remaining > 0 and self.shared.acquire(timeout=remaining)
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        if self.shared is not None:
+            self.shared.release()
+        self._semaphore.release()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'queue_timeout': self.queue_timeout,
+                'max_queue': self.max_queue,
+                'priority': self.shared is None,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.rejected_queue_full,
+                'rejected_timeout': self.rejected_timeout,
+                'avg_wait_ms': self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+                'max_wait_ms': self.max_wait * 1000
+            }
+
+
+class AdmissionController:
+    """Triedy endpointov a mapovanie endpointov na ne"""
+
+    def __init__(self, classes=None, routes=None, shared_limit=None):
+        classes = dict(classes or DEFAULT_CLASSES)
+        limits = _parse_overrides(ADMISSION_LIMITS, int)
+        timeouts = _parse_overrides(ADMISSION_QUEUE_TIMEOUTS, float)
+        shared_limit = ADMISSION_SHARED_LIMIT if shared_limit is None else shared_limit
+        shared = threading.BoundedSemaphore(shared_limit) if shared_limit > 0 else None
+
+        self.classes = {}
+        for name, (limit, queue_timeout, max_queue) in classes.items():
+            self.classes[name] = RouteClass(
+                name,
+                limits.get(name, limit),
+                timeouts.get(name, queue_timeout),
+                max_queue,
+                None if name in PRIORITY_CLASSES else shared
+            )
+        self.routes = routes or ROUTE_CLASSES
+
+    def class_for(self, endpoint):
+        """Trieda pre Flask endpoint alebo async handler s rovnakým názvom (None = bez obmedzenia)"""
+        name = self.routes.get(endpoint)
+        return self.classes.get(name) if name else None
+
+    def max_waiting(self):
+        """Najviac súčasne čakajúcich requestov všetkých tried"""
+        return sum(route_class.max_queue for route_class in self.classes.values())
+
+    def metrics(self):
+        return {name: route_class.metrics() for name, route_class in self.classes.items()}
@@ -3,60 +3,273 @@ REST API Server pre Launchpad Dashboard
 Umožňuje prepojenie s Wear OS hodinkami
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import jwt
 import datetime
 from functools import wraps
 import hashlib
-from database import DatabaseManager
+import gzip
+from sharding import ShardRouter
+from database import BULK_DELETE_MAX_CHUNK_SIZE, BULK_DELETE_MAX_PAUSE
+from compact import parse_fields, compact_list, rows_compact
+from report_rows import report_rows_compact
+from json_provider import install_json_provider
+from timer_journal import create_timer_journal, TIME_FORMAT
+from stale_timers import StaleTimerSweeper
+from bulk_import import IMPORT_KINDS, ImportFormatError, parse_rows, validate_rows
+from admission import AdmissionController
+from login_guard import LoginGuard
+from live_board import elapsed_seconds
+from traffic_capture import create_traffic_capture
 import os
 
 app = Flask(__name__)
 CORS(app)  # Povolí requesty z iných zariadení
 
+# Počet dôveryhodných proxy pred serverom (Render.com = 1). Adresa klienta sa berie
+# z X-Forwarded-For len o toľko hopov sprava - hodnoty doplnené klientom sa ignorujú.
+# 0 = hlavička sa ignoruje, klient je priamo remote_addr
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+# Rýchly JSON provider (orjson ak je k dispozícii), datetime/Decimal natívne
+install_json_provider(app)
+
 # Tajný kľúč pre JWT tokeny
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-secret-key')
 
-db = DatabaseManager()
+# DatabaseManager pre každý shard, sklad sa smeruje podľa DB_SHARD_MAP
+shards = ShardRouter()
+
+# Write-behind žurnál časovača (TIMER_WRITE_BEHIND=1), inak None = priamy zápis do DB.
+# Worker žurnálu má vlastné pripojenia, cache (reporty, živá tabuľa) zdieľa so shards
+timer_journal = create_timer_journal(shards.worker_router, shards.shard_name)
+
+# Sweeper zabudnutých časovačov - na pozadí (s vlastným pripojením, cache zdieľa so shards)
+# ho spúšťa až start_background_workers() zo vstupného bodu servera, nie import modulu
+stale_timer_sweeper = StaleTimerSweeper(lambda: shards.worker_router().managers())
+
+# Limity súbežných requestov podľa triedy endpointov (časovač, polling, katalóg, reporty, login)
+admission = AdmissionController()
+
+# Negatívna cache a throttling neúspešných prihlásení
+login_guard = LoginGuard()
+
+# Zachytávanie prevádzky pre traffic_replay.py (TRAFFIC_CAPTURE_PATH), inak None
+# Hooky sa registrujú pred admission control, aby trace obsahoval aj čakanie vo fronte
+traffic_capture = create_traffic_capture()
+if traffic_capture:
+    traffic_capture.install(app)
+
+# Odpovede väčšie ako tento limit (v bajtoch) sa posielajú gzip-komprimované
+GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
 
 # ============================================
 # HELPER FUNKCIE
 # ============================================
 
+def start_background_workers():
+    """Úlohy na pozadí servera - volá gunicorn.conf.py, ASGI lifespan a python api_server.py"""
+    stale_timer_sweeper.start_worker()
+
 def hash_password(password):
     """SHA256 hash hesla"""
     return hashlib.sha256(password.encode()).hexdigest()
 
+def decode_token(token):
+    """
+    Overenie hlavičky Authorization (aj pre ASGI server)
+    Vráti (current_user, None) alebo (None, chybová správa)
+    """
+    if not token:
+        return None, 'Token chýba'
+    
+    try:
+        # Odstráň "Bearer " prefix ak existuje
+        if token.startswith('Bearer '):
+            token = token[7:]
+        
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        current_user = {
+            'username': data['username'],
+            'warehouse': data['warehouse'],
+            'role': data['role']
+        }
+    except jwt.ExpiredSignatureError:
+        return None, 'Token expiroval'
+    except jwt.InvalidTokenError:
+        return None, 'Neplatný token'
+    
+    return current_user, None
+
+def issue_token(user):
+    """JWT token pre overeného používateľa (platnosť 30 dní)"""
+    return jwt.encode({
+        'username': user['username'],
+        'warehouse': user['warehouse'],
+        'role': user['role'],
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(days=30)
+    }, app.config['SECRET_KEY'], algorithm="HS256")
+
 def token_required(f):
     """Dekorátor pre overenie JWT tokenu"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
+        current_user, error = decode_token(request.headers.get('Authorization'))
         
-        if not token:
-            return jsonify({'error': 'Token chýba'}), 401
+        if error:
+            return jsonify({'error': error}), 401
         
-        try:
-            # Odstráň "Bearer " prefix ak existuje
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = {
-                'username': data['username'],
-                'warehouse': data['warehouse'],
-                'role': data['role']
-            }
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token expiroval'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Neplatný token'}), 401
+        g.current_user = current_user
+        return f(current_user, *args, **kwargs)
+    
+    return decorated
+
+def warehouse_db(current_user):
+    """DatabaseManager shardu, v ktorom sú dáta skladu používateľa"""
+    return shards.for_warehouse(current_user['warehouse'])
+
+def is_int(value):
+    """Celé číslo z JSON (bool je v Pythone tiež int)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def timer_record_id(data):
+    """
+    record_id z tela /api/timer/stop a /api/timer/cancel (aj pre ASGI server)
+    Vráti (record_id, None) alebo (None, (chybová správa, status))
+    """
+    record_id = (data or {}).get('record_id')
+    if isinstance(record_id, str) and record_id.lstrip('-').isdigit() and record_id.count('-') <= 1:
+        record_id = int(record_id)
+    
+    if not record_id:
+        return None, ('record_id je povinný', 400)
+    if not is_int(record_id):
+        return None, ('record_id musí byť celé číslo', 400)
+    # Provizórne (záporné) ID vydáva len write-behind žurnál - bez neho by stop nič neukončil
+    if record_id < 0 and not timer_journal:
+        return None, ('Provizórny záznam write-behind žurnálu, tento proces žurnál nevedie', 409)
+    
+    return record_id, None
+
+def timer_client_id(db, warehouse, client_id):
+    """
+    client_id z tela /api/timer/start overený voči indexu klientov skladu (aj pre ASGI server)
+    Vráti (client_id, None) alebo (None, (chybová správa, status)). Write-behind žurnál
+    by cudzieho klienta odmietol až pri prenose - hodinky by ukazovali časovač, ktorý nevznikne.
+    Ak sa index nedá načítať (DB nedostupná), klient sa prijme a rozhodne prenos.
+    """
+    if isinstance(client_id, str) and client_id.isdigit():
+        client_id = int(client_id)
+    if not is_int(client_id):
+        return None, ('client_id musí byť celé číslo', 400)
+    if db.client_search.contains(warehouse, client_id) is False:
+        return None, ('Klient nenájdený', 404)
+    return client_id, None
+
+def admin_required(f):
+    """Dekorátor pre endpointy len pre adminov (použiť pod @token_required)"""
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if current_user['role'] != 'admin':
+            return jsonify({'error': 'Prístup len pre administrátora'}), 403
         
         return f(current_user, *args, **kwargs)
     
     return decorated
 
+def list_response(key, items, shared=None, columns=None):
+    """
+    Odpoveď so zoznamom objektov
+    Štandardne plné objekty (shared polia zopakované v každom prvku).
+    ?format=columnar alebo ?fields=id,name vráti kompaktnú formu,
+    kde sú shared polia (napr. warehouse) uvedené len raz na najvyššej úrovni.
+    columns (polia objektov) zaručia rovnaký tvar columnar odpovede aj pre prázdny zoznam.
+    """
+    return jsonify(list_body(key, items, shared, request.args.get('fields'), request.args.get('format'), columns))
+
+def list_body(key, items, shared=None, fields=None, format=None, columns=None):
+    """Telo odpovede list_response z hodnôt ?fields= a ?format="""
+    shared = shared or {}
+    fields = parse_fields(fields)
+    columnar = format == 'columnar'
+    
+    if not fields and not columnar:
+        return {key: [{**item, **shared} for item in items]}
+    
+    body = {key: compact_list(items, fields, columnar, columns)}
+    body.update(shared)
+    return body
+
+def rows_response(key, columns, rows, shared=None):
+    """Ako list_response, ale z riadkov DB (tuple v poradí columns) bez dict-u na riadok"""
+    return jsonify(rows_body(key, columns, rows, shared, request.args.get('fields'), request.args.get('format')))
+
+def rows_body(key, columns, rows, shared=None, fields=None, format=None):
+    """Telo rows_response z hodnôt ?fields= a ?format="""
+    shared = shared or {}
+    fields = parse_fields(fields)
+    columnar = format == 'columnar'
+    
+    if shared and not fields and not columnar:
+        columns = list(columns) + list(shared)
+        rows = [tuple(row) + tuple(shared.values()) for row in rows]
+        shared = {}
+    
+    body = {key: rows_compact(columns, rows, fields, columnar)}
+    body.update(shared)
+    return body
+
+@app.before_request
+def admit_request():
+    """Admission control - request čaká na voľné miesto vo svojej triede alebo je odmietnutý"""
+    if request.method == 'OPTIONS' or request.environ.get('launchpad.admitted'):
+        # Request z ASGI servera prijala admission control už pred WSGI mostom
+        return None
+    
+    route_class = admission.class_for(request.endpoint)
+    if route_class is None:
+        return None
+    
+    rejected = route_class.acquire()
+    if rejected:
+        response = jsonify({'error': 'Server je preťažený, skús to znova neskôr'})
+        response.status_code = rejected
+        response.headers['Retry-After'] = str(route_class.retry_after)
+        return response
+    
+    g.admission_class = route_class
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    """Uvoľnenie miesta v triede po dokončení requestu"""
+    route_class = g.pop('admission_class', None)
+    if route_class is not None:
+        route_class.release()
+
+@app.after_request
+def compress_response(response):
+    """Gzip kompresia veľkých JSON odpovedí (ak ju klient podporuje)"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
 # ============================================
 # API ENDPOINTS
 # ============================================
@@ -84,30 +297,41 @@ def login():
     
     username = data['username']
     password = hash_password(data['password'])
+    ip = request.remote_addr
+    
+    # Opakované zlé prihlásenia sa vybavia z pamäte bez dotazu do DB
+    decision, retry_after = login_guard.check(username, password, ip)
+    if decision == 'throttled':
+        response = jsonify({'error': 'Príliš veľa neúspešných pokusov, skús to neskôr'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    if decision == 'rejected':
+        return jsonify({'error': 'Nesprávne prihlasovacie údaje'}), 401
     
     # Overenie v databáze
-    user = db.verify_user(username, password)
+    user = shards.verify_user(username, password)
     
     if not user:
+        login_guard.failed(username, password, ip)
         return jsonify({'error': 'Nesprávne prihlasovacie údaje'}), 401
     
-    # Vytvorenie JWT tokenu (platnosť 30 dní)
-    token = jwt.encode({
-        'username': user['username'],
-        'warehouse': user['warehouse'],
-        'role': user['role'],
-        'exp': datetime.datetime.utcnow() + datetime.timedelta(days=30)
-    }, app.config['SECRET_KEY'], algorithm="HS256")
-    
-    return jsonify({
-        'token': token,
+    return jsonify(login_body(user))
+
+def login_body(user):
+    """Odpoveď úspešného prihlásenia s JWT tokenom"""
+    return {
+        'token': issue_token(user),
         'user': {
             'username': user['username'],
             'full_name': user['full_name'],
             'warehouse': user['warehouse'],
             'role': user['role']
         }
-    })
+    }
+
+# Polia klientov a úkonov v /api/clients a /api/tasks
+CATALOG_COLUMNS = ('id', 'name')
 
 @app.route('/api/clients', methods=['GET'])
 @token_required
@@ -115,18 +339,44 @@ def get_clients(current_user):
     """
     Zoznam klientov pre daný sklad
     Headers: Authorization: Bearer <token>
+    Query params: ?format=columnar, ?fields=id,name
     """
+    db = warehouse_db(current_user)
+    
     warehouse = current_user['warehouse']
     clients = db.get_clients(warehouse)
     
+    return list_response('clients', [
+        {
+            'id': client[0],
+            'name': client[1]
+        }
+        for client in clients
+    ], shared={'warehouse': warehouse}, columns=CATALOG_COLUMNS)
+
+@app.route('/api/clients/search', methods=['GET'])
+@token_required
+def search_clients(current_user):
+    """
+    Type-ahead vyhľadávanie klientov (bez diakritiky, z in-memory indexu)
+    Query params: ?q=nov&limit=10
+    """
+    db = warehouse_db(current_user)
+    
+    warehouse = current_user['warehouse']
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    
+    matches = db.client_search.search(warehouse, query, limit)
+    
     return jsonify({
         'clients': [
             {
-                'id': client[0],
-                'name': client[1],
-                'warehouse': client[2]
+                'id': client_id,
+                'name': client_name,
+                'warehouse': warehouse
             }
-            for client in clients
+            for client_id, client_name in matches
         ]
     })
 
@@ -136,20 +386,61 @@ def get_tasks(current_user):
     """
     Zoznam úkonov/actions pre daný sklad
     Headers: Authorization: Bearer <token>
+    Query params: ?format=columnar, ?fields=id,name
     """
+    db = warehouse_db(current_user)
+    
     warehouse = current_user['warehouse']
     tasks = db.get_tasks(warehouse)
     
-    return jsonify({
-        'tasks': [
-            {
-                'id': task[0],
-                'name': task[1],
-                'warehouse': task[2]
-            }
-            for task in tasks
-        ]
-    })
+    return list_response('tasks', [
+        {
+            'id': task[0],
+            'name': task[1]
+        }
+        for task in tasks
+    ], shared={'warehouse': warehouse}, columns=CATALOG_COLUMNS)
+
+@app.route('/api/bootstrap', methods=['GET'])
+@token_required
+def bootstrap(current_user):
+    """
+    Všetko pre štart hodiniek jedným requestom - klienti, úkony, aktívny časovač
+    a verzia katalógu. Ak sa ?catalog_version= zhoduje, klienti a úkony sa neposielajú.
+    """
+    db = warehouse_db(current_user)
+    
+    warehouse = current_user['warehouse']
+    data = db.get_bootstrap(current_user['username'], warehouse)
+    
+    if data is None:
+        return jsonify({'error': 'Nepodarilo sa načítať dáta'}), 500
+    if not data['user_id']:
+        return jsonify({'error': 'Používateľ nenájdený'}), 404
+    
+    active_record = None
+    if timer_journal:
+        active_record = pending_active_record(db, data['user_id'], warehouse)
+    if not active_record:
+        active_record = data['active_record']
+    
+    return jsonify(bootstrap_body(warehouse, data, active_record, request.args.get('catalog_version')))
+
+def bootstrap_body(warehouse, data, active_record, catalog_version=None):
+    """Odpoveď /api/bootstrap - zoznamy len ak klient nemá aktuálnu verziu katalógu"""
+    response = {
+        'warehouse': warehouse,
+        'catalog_version': data['catalog_version'],
+        'timer': active_timer_json(active_record, warehouse)
+    }
+    
+    if catalog_version == data['catalog_version']:
+        response['catalog_unchanged'] = True
+    else:
+        response['clients'] = [{'id': client[0], 'name': client[1]} for client in data['clients']]
+        response['tasks'] = [{'id': task[0], 'name': task[1]} for task in data['tasks']]
+    
+    return response
 
 @app.route('/api/timer/start', methods=['POST'])
 @token_required
@@ -158,12 +449,13 @@ def start_timer(current_user):
     Spustenie časovača
     Body: {"client_id": 123}
     """
+    db = warehouse_db(current_user)
+    
     data = request.get_json()
     
     if not data or not data.get('client_id'):
         return jsonify({'error': 'client_id je povinný'}), 400
     
-    client_id = data['client_id']
     username = current_user['username']
     
     # Získaj user_id
@@ -173,8 +465,16 @@ def start_timer(current_user):
     
     user_id = user[0]
     
-    # Spusti časovač
-    record_id = db.start_time_record(user_id, client_id)
+    client_id, error = timer_client_id(db, current_user['warehouse'], data['client_id'])
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    
+    # Spusti časovač (pri write-behind len zápis do žurnálu, ID je provizórne)
+    if timer_journal:
+        record_id = timer_journal.start(user_id, client_id, warehouse=current_user['warehouse'])
+        db.recent_usage.record_start(user_id, client_id, record_id)
+    else:
+        record_id = db.start_time_record(user_id, client_id)
     
     if record_id:
         return jsonify({
@@ -196,17 +496,23 @@ def stop_timer(current_user):
         "custom_task_name": "My custom action"  // voliteľné - vlastný názov úkonu
     }
     """
+    db = warehouse_db(current_user)
+    
     data = request.get_json()
     
-    if not data or not data.get('record_id'):
-        return jsonify({'error': 'record_id je povinný'}), 400
+    record_id, error = timer_record_id(data)
+    if error:
+        return jsonify({'error': error[0]}), error[1]
     
-    record_id = data['record_id']
     task_id = data.get('task_id')  # môže byť None
     custom_task_name = data.get('custom_task_name')  # môže byť None
     
     # Zastav časovač s úkonom
-    success = db.end_time_record(record_id, task_id, custom_task_name)
+    if timer_journal:
+        success = timer_journal.end(record_id, task_id, custom_task_name, warehouse=current_user['warehouse'])
+        db.recent_usage.record_end(record_id, task_id, custom_task_name)
+    else:
+        success = db.end_time_record(record_id, task_id, custom_task_name)
     
     if success:
         return jsonify({
@@ -223,14 +529,20 @@ def cancel_timer(current_user):
     Zrušenie (zmazanie) aktívneho časovača
     Body: { record_id: int }
     """
+    db = warehouse_db(current_user)
+    
     data = request.get_json()
-    record_id = data.get('record_id')
     
-    if not record_id:
-        return jsonify({'error': 'record_id je povinný'}), 400
+    record_id, error = timer_record_id(data)
+    if error:
+        return jsonify({'error': error[0]}), error[1]
     
     # Zruš záznam (zmaž ho z databázy)
-    success = db.cancel_time_record(record_id)
+    if timer_journal:
+        success = timer_journal.cancel(record_id, warehouse=current_user['warehouse'])
+        db.recent_usage.record_cancel(record_id)
+    else:
+        success = db.cancel_time_record(record_id)
     
     if success:
         return jsonify({
@@ -247,6 +559,8 @@ def get_active_timer(current_user):
     Získanie aktívneho časovača pre používateľa
     Returns: Aktívny záznam alebo null
     """
+    db = warehouse_db(current_user)
+    
     username = current_user['username']
     
     # Získaj user_id
@@ -257,10 +571,22 @@ def get_active_timer(current_user):
     user_id = user[0]
     
     # Nájdi aktívny záznam (kde end_time je NULL)
-    active_record = db.get_active_time_record(user_id)
+    active_record = None
+    if timer_journal:
+        active_record = pending_active_record(db, user_id, current_user['warehouse'])
+    if not active_record:
+        active_record = db.get_active_time_record(user_id)
+    
+    return jsonify(active_timer_json(active_record, current_user['warehouse']))
+
+def active_timer_json(active_record, warehouse):
+    """Aktívny záznam skladu v tvare odpovede /api/timer/active"""
+    # Zastavený v žurnáli, ale ešte neprenesený do DB
+    if active_record and timer_journal and timer_journal.is_closed(active_record['record_id'], warehouse):
+        active_record = None
     
     if active_record:
-        return jsonify({
+        return {
             'active': True,
             'record': {
                 'record_id': active_record['record_id'],
@@ -268,38 +594,418 @@ def get_active_timer(current_user):
                 'start_time': active_record['start_time'].isoformat(),
                 'elapsed_seconds': active_record['elapsed_seconds']
             }
-        })
+        }
     else:
-        return jsonify({
+        return {
             'active': False,
             'record': None
-        })
+        }
+
+def pending_active_record(db, user_id, warehouse):
+    """Aktívny záznam z neprenesených udalostí žurnálu v tvare get_active_time_record"""
+    event = timer_journal.pending_active(user_id, warehouse)
+    if not event:
+        return None
+    
+    start_time = datetime.datetime.strptime(event['time'], TIME_FORMAT)
+    client_names = db.client_search.lookup(warehouse, [event['client_id']])
+    return {
+        'record_id': event['record_id'],
+        'client_name': client_names.get(event['client_id']),
+        'start_time': start_time,
+        'elapsed_seconds': int((datetime.datetime.now() - start_time).total_seconds())
+    }
+
+# Poradie stĺpcov get_user_time_records(row_format='tuple') = polia /api/timer/history
+HISTORY_COLUMNS = ('record_id', 'client_name', 'start_time', 'end_time', 'duration_seconds')
 
 @app.route('/api/timer/history', methods=['GET'])
 @token_required
 def get_timer_history(current_user):
     """
     História časových záznamov
-    Query params: ?limit=10
+    Query params: ?limit=10, ?format=columnar, ?fields=record_id,client_name
     """
+    db = warehouse_db(current_user)
+    
     username = current_user['username']
-    warehouse = current_user['warehouse']
     limit = request.args.get('limit', 10, type=int)
     
-    # Získaj posledných X záznamov
-    records = db.get_user_time_records(username, warehouse, limit)
+    # Získaj user_id
+    user = db.get_user_by_username(username)
+    if not user:
+        return jsonify({'error': 'Používateľ nenájdený'}), 404
     
-    return jsonify({
-        'records': [
-            {
-                'record_id': rec['record_id'],
-                'client_name': rec['client_name'],
-                'start_time': rec['start_time'].isoformat() if rec['start_time'] else None,
-                'end_time': rec['end_time'].isoformat() if rec['end_time'] else None,
-                'duration_seconds': rec['duration_seconds']
-            }
-            for rec in records
+    # Získaj posledných X záznamov (riadky idú do JSON priamo, datetime kóduje JSON provider)
+    records = db.get_user_time_records(user[0], limit, row_format='tuple')
+    
+    return rows_response('records', HISTORY_COLUMNS, records)
+
+@app.route('/api/me/recent', methods=['GET'])
+@token_required
+def get_recent(current_user):
+    """
+    Naposledy a najčastejšie používaní klienti a úkony (quick-start na hodinkách)
+    Query params: ?limit=5
+    """
+    db = warehouse_db(current_user)
+    
+    username = current_user['username']
+    warehouse = current_user['warehouse']
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 20)
+    
+    # Získaj user_id
+    user = db.get_user_by_username(username)
+    if not user:
+        return jsonify({'error': 'Používateľ nenájdený'}), 404
+    
+    return jsonify(recent_body(db, user[0], warehouse, limit))
+
+def recent_body(db, user_id, warehouse, limit):
+    """Odpoveď /api/me/recent z in-memory sledovania použitia"""
+    usage = db.recent_usage.get(user_id, limit)
+    
+    # Názvy klientov z in-memory indexu (neaktívni klienti vypadnú)
+    client_ids = set(usage['clients']['recent']) | set(usage['clients']['frequent'])
+    client_names = db.client_search.lookup(warehouse, client_ids)
+    
+    task_keys = usage['tasks']['recent'] + usage['tasks']['frequent']
+    task_names = {}
+    if any(isinstance(key, int) for key in task_keys):
+        task_names = {task[0]: task[1] for task in db.get_tasks(warehouse)}
+    
+    def clients_list(ids):
+        return [
+            {'id': client_id, 'name': client_names[client_id]}
+            for client_id in ids if client_id in client_names
         ]
+    
+    def tasks_list(keys):
+        # Kľúč je ID úkonu alebo názov vlastného úkonu (custom_task_name)
+        items = []
+        for key in keys:
+            if isinstance(key, int):
+                if key in task_names:
+                    items.append({'id': key, 'name': task_names[key]})
+            else:
+                items.append({'id': None, 'name': key})
+        return items
+    
+    return {
+        'clients': {
+            'recent': clients_list(usage['clients']['recent']),
+            'frequent': clients_list(usage['clients']['frequent'])
+        },
+        'tasks': {
+            'recent': tasks_list(usage['tasks']['recent']),
+            'frequent': tasks_list(usage['tasks']['frequent'])
+        }
+    }
+
+@app.route('/api/warehouse/live', methods=['GET'])
+@token_required
+@admin_required
+def get_warehouse_live(current_user):
+    """
+    Živá tabuľa skladu - všetky práve bežiace časovače s používateľom, klientom a časom
+    Stav sa načítava jedným dotazom a krátko zdieľa medzi všetkými supervízormi skladu
+    """
+    db = warehouse_db(current_user)
+    
+    warehouse = current_user['warehouse']
+    records, age = db.live_board.get(warehouse)
+    
+    if records is None:
+        return jsonify({'error': 'Nepodarilo sa načítať bežiace časovače'}), 500
+    
+    # Uplynulý čas počítala DB pri načítaní, k nemu sa pripočíta vek cache
+    now = datetime.datetime.now()
+    timers = [
+        live_timer_json(record, max(0, record['elapsed_seconds']) + int(age))
+        for record in records
+        # Zastavené v žurnáli, ale ešte neprenesené do DB
+        if not (timer_journal and timer_journal.is_closed(record['record_id'], warehouse))
+    ]
+    if timer_journal:
+        timers.extend(pending_live_timers(db, warehouse, now))
+        timers.sort(key=lambda timer: timer['start_time'])
+    
+    response = jsonify({
+        'warehouse': warehouse,
+        'generated_at': now.isoformat(),
+        'count': len(timers),
+        'timers': timers
+    })
+    response.headers['Cache-Control'] = f"private, max-age={int(db.live_board.ttl)}"
+    return response
+
+def live_timer_json(record, elapsed):
+    """Bežiaci časovač v tvare /api/warehouse/live"""
+    return {
+        'record_id': record['record_id'],
+        'username': record['username'],
+        'full_name': record['full_name'],
+        'client_id': record['client_id'],
+        'client_name': record['client_name'],
+        'start_time': record['start_time'].isoformat(),
+        'elapsed_seconds': elapsed
+    }
+
+def pending_live_timers(db, warehouse, now):
+    """Bežiace časovače z neprenesených štartov žurnálu (čas udalosti je z hodín API servera)"""
+    events = timer_journal.pending_open(warehouse)
+    if not events:
+        return []
+    
+    users = db.live_board.users(warehouse)
+    client_names = db.client_search.lookup(warehouse, {event['client_id'] for event in events})
+    
+    timers = []
+    for event in events:
+        user = users.get(event['user_id'], {})
+        start_time = datetime.datetime.strptime(event['time'], TIME_FORMAT)
+        timers.append(live_timer_json({
+            'record_id': event['record_id'],
+            'username': user.get('username'),
+            'full_name': user.get('full_name'),
+            'client_id': event['client_id'],
+            'client_name': client_names.get(event['client_id']),
+            'start_time': start_time
+        }, elapsed_seconds(start_time, now)))
+    return timers
+
+@app.route('/api/admin/timer-journal', methods=['GET'])
+@token_required
+@admin_required
+def get_timer_journal_metrics(current_user):
+    """
+    Stav write-behind žurnálu časovača (hĺbka fronty, oneskorenie prenosu do DB)
+    """
+    if not timer_journal:
+        return jsonify({'enabled': False})
+    
+    return jsonify({'enabled': True, **timer_journal.metrics()})
+
+@app.route('/api/admin/coalescing', methods=['GET'])
+@token_required
+@admin_required
+def get_coalescing_metrics(current_user):
+    """
+    Štatistiky zlučovania súbežných čítaní (single-flight) podľa metódy, súčet cez shardy
+    """
+    totals = {}
+    for manager in shards.managers():
+        for name, values in manager.single_flight.metrics().items():
+            total = totals.setdefault(name, {'calls': 0, 'executions': 0, 'coalesced': 0})
+            for key in total:
+                total[key] += values[key]
+    
+    for total in totals.values():
+        total['ratio'] = total['coalesced'] / total['calls'] if total['calls'] else 0.0
+    
+    return jsonify(totals)
+
+@app.route('/api/admin/admission', methods=['GET'])
+@token_required
+@admin_required
+def get_admission_metrics(current_user):
+    """
+    Metriky admission control podľa triedy (aktívne, čakajúce, odmietnuté, čas vo fronte)
+    """
+    return jsonify(admission.metrics())
+
+@app.route('/api/admin/login-guard', methods=['GET'])
+@token_required
+@admin_required
+def get_login_guard_metrics(current_user):
+    """
+    Metriky ochrany prihlásenia (negatívna cache, throttling, dotazy do DB)
+    """
+    return jsonify(login_guard.metrics())
+
+@app.route('/api/admin/stale-timers', methods=['GET'])
+@token_required
+@admin_required
+def get_stale_timers_status(current_user):
+    """
+    Konfigurácia sweepera zabudnutých časovačov a jeho posledné behy
+    """
+    return jsonify(stale_timer_sweeper.status())
+
+@app.route('/api/admin/stale-timers/sweep', methods=['POST'])
+@token_required
+@admin_required
+def sweep_stale_timers(current_user):
+    """
+    Okamžitý beh sweepera pre sklad administrátora
+    Returns: súhrn behu (nájdené a ukončené záznamy)
+    """
+    summary = stale_timer_sweeper.run(warehouse_db(current_user), current_user['warehouse'])
+    return jsonify(summary)
+
+@app.route('/api/admin/reports', methods=['GET'])
+@token_required
+@admin_required
+def get_report(current_user):
+    """
+    Report časových záznamov skladu administrátora
+    Query params: ?start_date=2026-01-01 (povinný), ?end_date=2026-01-31,
+                  ?format=columnar, ?fields=username,start_time,duration_seconds
+    Riadky idú do JSON priamo bez dict-u na riadok (datetime kóduje JSON provider)
+    """
+    db = warehouse_db(current_user)
+    
+    warehouse = current_user['warehouse']
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if not start_date:
+        return jsonify({'error': 'start_date je povinný'}), 400
+    try:
+        for value in (start_date, end_date):
+            if value:
+                datetime.date.fromisoformat(value)
+    except ValueError:
+        return jsonify({'error': 'Dátum musí byť v tvare YYYY-MM-DD'}), 400
+    
+    columnar = request.args.get('format') == 'columnar'
+    records = db.get_warehouse_time_records(
+        warehouse, start_date, end_date, row_format='columns' if columnar else 'tuple'
+    )
+    
+    return jsonify({
+        'warehouse': warehouse,
+        'count': len(records),
+        'records': report_rows_compact(records, parse_fields(request.args.get('fields')), columnar)
+    })
+
+@app.route('/api/admin/time-records/delete', methods=['POST'])
+@token_required
+@admin_required
+def bulk_delete_time_records(current_user):
+    """
+    Hromadné mazanie časových záznamov skladu po dávkach
+    Body: {"record_ids": [1, 2, ...]}
+       alebo {"start_date": "2026-01-01", "end_date": "2026-01-31", "user_id": 5, "client_id": 7}
+    Voliteľne: "chunk_size": 500, "pause_ms": 50
+    Returns: {"requested", "deleted", "chunks", "error"}
+    """
+    db = warehouse_db(current_user)
+    
+    data = request.get_json(silent=True)
+    warehouse = current_user['warehouse']
+    
+    params, error = bulk_delete_params(data if data is not None else {})
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def log_progress(deleted, processed, total):
+        print(f"Hromadné mazanie ({warehouse}): zmazaných {deleted}, spracovaných {processed}/{total or '?'}")
+    
+    if params['record_ids'] is not None:
+        result = db.delete_time_records_chunked(
+            params['record_ids'], warehouse, params['chunk_size'], params['pause'], log_progress
+        )
+    else:
+        result = db.delete_time_records_by_filter(
+            warehouse, chunk_size=params['chunk_size'], pause=params['pause'],
+            progress=log_progress, **params['filters']
+        )
+    
+    status = 500 if result['error'] and not result['deleted'] else 200
+    return jsonify(result), status
+
+def bulk_delete_params(data):
+    """
+    Overenie tela /api/admin/time-records/delete
+    Vráti (parametre, None) alebo (None, chybová správa pre 400)
+    """
+    if not isinstance(data, dict):
+        return None, 'Telo musí byť JSON objekt'
+    
+    chunk_size = data.get('chunk_size')
+    if chunk_size is not None and not (is_int(chunk_size) and 0 < chunk_size <= BULK_DELETE_MAX_CHUNK_SIZE):
+        return None, f'chunk_size musí byť celé číslo 1 - {BULK_DELETE_MAX_CHUNK_SIZE}'
+    
+    pause = data.get('pause_ms')
+    if pause is not None:
+        if not (isinstance(pause, (int, float)) and not isinstance(pause, bool)
+                and 0 <= pause <= BULK_DELETE_MAX_PAUSE * 1000):
+            return None, f'pause_ms musí byť číslo 0 - {int(BULK_DELETE_MAX_PAUSE * 1000)}'
+        pause = pause / 1000
+    
+    params = {'chunk_size': chunk_size, 'pause': pause, 'record_ids': None, 'filters': None}
+    
+    record_ids = data.get('record_ids')
+    if record_ids is not None:
+        if not isinstance(record_ids, list) or not record_ids or not all(is_int(i) for i in record_ids):
+            return None, 'record_ids musí byť neprázdny zoznam celých čísel'
+        params['record_ids'] = record_ids
+        return params, None
+    
+    filters = {key: data.get(key) for key in ('start_date', 'end_date', 'user_id', 'client_id')}
+    if not any(value is not None for value in filters.values()):
+        return None, 'record_ids alebo aspoň jeden filter je povinný'
+    for key in ('start_date', 'end_date'):
+        if filters[key] is not None:
+            try:
+                datetime.date.fromisoformat(filters[key])
+            except (TypeError, ValueError):
+                return None, f'{key} musí byť dátum v tvare RRRR-MM-DD'
+    for key in ('user_id', 'client_id'):
+        if filters[key] is not None and not (is_int(filters[key]) and filters[key] > 0):
+            return None, f'{key} musí byť kladné celé číslo'
+    
+    params['filters'] = filters
+    return params, None
+
+@app.route('/api/admin/import/<kind>', methods=['POST'])
+@token_required
+@admin_required
+def bulk_import(current_user, kind):
+    """
+    Hromadný import do skladu administrátora
+    kind: users | clients | tasks
+    Body: JSON [{...}, ...] / {"rows": [...]} alebo CSV s hlavičkou (Content-Type: text/csv)
+      users: username, password, full_name, role (voliteľné)
+      clients: client_name
+      tasks: task_name
+    Returns: {"total", "inserted", "errors": [{"row", "error"}]}
+    """
+    db = warehouse_db(current_user)
+    
+    if kind not in IMPORT_KINDS:
+        return jsonify({'error': f'Neznámy typ importu: {kind}'}), 404
+    
+    try:
+        rows = parse_rows(request.get_data(), request.content_type)
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Validácia celého vstupu pred zápisom
+    valid, errors = validate_rows(kind, rows)
+    warehouse = current_user['warehouse']
+    
+    if kind == 'users':
+        result = db.bulk_add_users(valid, warehouse)
+        # Noví používatelia sa môžu hneď prihlásiť
+        login_guard.negative.invalidate(row['username'] for _, row in valid)
+    else:
+        admin = db.get_user_by_username(current_user['username'])
+        if not admin:
+            return jsonify({'error': 'Používateľ nenájdený'}), 404
+        if kind == 'clients':
+            result = db.bulk_add_clients(valid, warehouse, admin[0])
+        else:
+            result = db.bulk_add_tasks(valid, warehouse, admin[0])
+    
+    if result is None:
+        return jsonify({'error': 'Import sa nepodaril'}), 500
+    
+    return jsonify({
+        'total': len(rows),
+        'inserted': result['inserted'],
+        'errors': sorted(errors + result['errors'], key=lambda error: error['row'])
     })
 
 # ============================================
@@ -313,5 +1019,7 @@ if __name__ == '__main__':
     print("\n💡 Pre prístup z hodiniek musíš byť na rovnakej WiFi sieti")
     print("=" * 60)
     
+    start_background_workers()
+    
     # V produkcii použi host='0.0.0.0' pre prístup z iných zariadení
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,592 @@
+"""
+ASGI server pre Launchpad Dashboard - rovnaké API ako api_server:app
+Spustenie: uvicorn asgi_server:app --host 0.0.0.0 --port $PORT
+
+Spúšťa sa ako jeden proces (bez --workers) - žurnál časovačov patrí jednému procesu.
+
+Endpointy hodiniek (login, katalóg, časovač, polling) majú async handlery nad
+AsyncDatabaseManager - tisíce nečinných spojení nezaberajú vlákna ani pripojenia do DB.
+Pre ne sa robí to isté, čo Flask hooky: admission control, zachytávanie prevádzky,
+gzip a CORS hlavička. Ostatné endpointy (admin, CORS preflight) sa preposielajú do Flask
+aplikácie cez WSGI most na jednom vlákne (synchrónne DatabaseManager majú jedno pripojenie);
+admission control ich prijíma ešte pred frontou tohto vlákna.
+"""
+
+import asyncio
+import datetime
+import gzip
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import HTTPException
+
+from api_server import (
+    app as flask_app, shards, timer_journal, login_guard, admission, traffic_capture,
+    GZIP_MIN_SIZE, TRUSTED_PROXY_HOPS,
+    hash_password, decode_token, login_body, list_body, rows_body, bootstrap_body,
+    HISTORY_COLUMNS, CATALOG_COLUMNS, recent_body, active_timer_json, pending_active_record,
+    timer_record_id, timer_client_id, start_background_workers
+)
+from async_database import AsyncShardRouter, PoolTimeout
+
+# Async pool pripojení pre každý shard (zdieľa in-memory stav s Flask aplikáciou)
+async_shards = AsyncShardRouter(shards)
+
+# Endpointy obslúžené Flask aplikáciou bežia na jednom vlákne - zdieľajú synchrónne
+# DatabaseManager shardov (jedno pripojenie na shard), rovnako ako sync gunicorn
+wsgi_executor = ThreadPoolExecutor(1, thread_name_prefix='asgi-wsgi')
+
+# Vlákna pre requesty čakajúce vo fronte admission control (najviac max_queue každej triedy)
+admission_executor = ThreadPoolExecutor(admission.max_waiting(), thread_name_prefix='asgi-admission')
+
+# ============================================
+# REQUEST / RESPONSE
+# ============================================
+
+class Request:
+    """Request z ASGI scope s rozhraním podobným flask.request"""
+
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {}
+        for name, value in scope['headers']:
+            name = name.decode('latin1').lower()
+            value = value.decode('latin1')
+            self.headers[name] = f"{self.headers[name]},{value}" if name in self.headers else value
+        self.query = parse_qs(scope['query_string'].decode('latin1'), keep_blank_values=True)
+        self.client = scope.get('client')
+        self.body = body
+
+    def arg(self, name, default=None, type=None):
+        """Ako request.args.get - pri nevalidnej hodnote vráti default"""
+        values = self.query.get(name)
+        if not values:
+            return default
+        if type is None:
+            return values[0]
+        try:
+            return type(values[0])
+        except ValueError:
+            return default
+
+    def get_json(self):
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    @property
+    def remote_ip(self):
+        # Rovnako ako ProxyFix vo Flasku - adresa TRUSTED_PROXY_HOPS sprava z X-Forwarded-For
+        if TRUSTED_PROXY_HOPS:
+            forwarded = [ip.strip() for ip in self.headers.get('x-forwarded-for', '').split(',')]
+            if len(forwarded) >= TRUSTED_PROXY_HOPS and forwarded[-TRUSTED_PROXY_HOPS]:
+                return forwarded[-TRUSTED_PROXY_HOPS]
+        return self.client[0] if self.client else None
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def send_json(send, request, status, body, headers=None):
+    """JSON odpoveď cez JSON provider Flask aplikácie, gzip ako compress_response; vráti veľkosť tela"""
+    if hasattr(flask_app.json, 'dumpb'):
+        data = flask_app.json.dumpb(body)
+    else:
+        data = flask_app.json.dumps(body, separators=(',', ':')).encode()
+    response_headers = [
+        (b'content-type', b'application/json'),
+        (b'access-control-allow-origin', b'*'),
+    ]
+    for name, value in (headers or {}).items():
+        response_headers.append((name.lower().encode(), str(value).encode()))
+
+    if (status == 200
+            and len(data) >= GZIP_MIN_SIZE
+            and 'gzip' in request.headers.get('accept-encoding', '').lower()):
+        data = gzip.compress(data, compresslevel=6)
+        response_headers.append((b'content-encoding', b'gzip'))
+        response_headers.append((b'vary', b'Accept-Encoding'))
+
+    response_headers.append((b'content-length', str(len(data)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': data})
+    return len(data)
+
+# ============================================
+# WSGI MOST (endpointy obslúžené Flask aplikáciou)
+# ============================================
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        key = 'HTTP_' + name
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def call_wsgi(environ):
+    """Flask aplikácia ako WSGI volanie, vráti (status, hlavičky, telo)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], body
+
+
+def flask_endpoint(scope):
+    """Názov Flask endpointu pre request (None ak cesta neexistuje)"""
+    try:
+        endpoint, _ = flask_app.url_map.bind('localhost').match(scope['path'], method=scope['method'])
+    except HTTPException:
+        return None
+    return endpoint
+
+
+async def wsgi_fallback(scope, body, send):
+    # Admission control ešte pred frontou jediného WSGI vlákna - inak by requesty čakali
+    # v executore a semafory tried by nikdy nevideli viac ako jeden naraz
+    route_class = None
+    if scope['method'] != 'OPTIONS':
+        route_class = admission.class_for(flask_endpoint(scope))
+    if route_class is not None:
+        rejected = await admit(route_class)
+        if rejected:
+            await send_json(send, Request(scope, body), rejected,
+                            {'error': 'Server je preťažený, skús to znova neskôr'},
+                            {'Retry-After': route_class.retry_after})
+            return
+
+    environ = wsgi_environ(scope, body)
+    # admit_request vo Flasku request znova nepočíta
+    environ['launchpad.admitted'] = route_class is not None
+    loop = asyncio.get_running_loop()
+    try:
+        status, headers, data = await loop.run_in_executor(wsgi_executor, call_wsgi, environ)
+    finally:
+        if route_class is not None:
+            route_class.release()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+    })
+    await send({'type': 'http.response.body', 'body': data})
+
+# ============================================
+# ASYNC ENDPOINTY (hodinky)
+# Handler vráti (status, telo) alebo (status, telo, hlavičky)
+# ============================================
+
+ROUTES = {}
+
+
+def route(method, path, auth=True):
+    """Registrácia async handlera; auth=True overí JWT ako @token_required"""
+    def register(handler):
+        ROUTES[(method, path)] = (handler, auth)
+        return handler
+    return register
+
+
+def not_found_user():
+    return 404, {'error': 'Používateľ nenájdený'}
+
+
+@route('GET', '/api/health', auth=False)
+async def health_check(request):
+    return 200, {
+        'status': 'online',
+        'message': 'Launchpad Dashboard API v1.0',
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+
+
+@route('POST', '/api/login', auth=False)
+async def login(request):
+    data = request.get_json()
+
+    if not data or not data.get('username') or not data.get('password'):
+        return 400, {'error': 'Username a password sú povinné'}
+
+    username = data['username']
+    password = hash_password(data['password'])
+    ip = request.remote_ip
+
+    # Opakované zlé prihlásenia sa vybavia z pamäte bez dotazu do DB
+    decision, retry_after = login_guard.check(username, password, ip)
+    if decision == 'throttled':
+        return 429, {'error': 'Príliš veľa neúspešných pokusov, skús to neskôr'}, {'Retry-After': retry_after}
+    if decision == 'rejected':
+        return 401, {'error': 'Nesprávne prihlasovacie údaje'}
+
+    user = await async_shards.verify_user(username, password)
+
+    if not user:
+        login_guard.failed(username, password, ip)
+        return 401, {'error': 'Nesprávne prihlasovacie údaje'}
+
+    return 200, login_body(user)
+
+
+@route('GET', '/api/clients')
+async def get_clients(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+    clients = await db.get_clients(warehouse)
+
+    return 200, list_body('clients', [
+        {
+            'id': client[0],
+            'name': client[1]
+        }
+        for client in clients
+    ], {'warehouse': warehouse}, request.arg('fields'), request.arg('format'), CATALOG_COLUMNS)
+
+
+@route('GET', '/api/clients/search')
+async def search_clients(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+    query = request.arg('q', '')
+    limit = min(max(request.arg('limit', 10, type=int), 1), 50)
+
+    # Index sa pri prvom použití/expirácii načíta z DB - na vlákne poolu
+    matches = await db.run(lambda manager: manager.client_search.search(warehouse, query, limit))
+
+    return 200, {
+        'clients': [
+            {
+                'id': client_id,
+                'name': client_name,
+                'warehouse': warehouse
+            }
+            for client_id, client_name in matches
+        ]
+    }
+
+
+@route('GET', '/api/tasks')
+async def get_tasks(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+    tasks = await db.get_tasks(warehouse)
+
+    return 200, list_body('tasks', [
+        {
+            'id': task[0],
+            'name': task[1]
+        }
+        for task in tasks
+    ], {'warehouse': warehouse}, request.arg('fields'), request.arg('format'), CATALOG_COLUMNS)
+
+
+@route('GET', '/api/bootstrap')
+async def bootstrap(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+    data = await db.get_bootstrap(current_user['username'], warehouse)
+
+    if data is None:
+        return 500, {'error': 'Nepodarilo sa načítať dáta'}
+    if not data['user_id']:
+        return not_found_user()
+
+    active_record = None
+    if timer_journal:
+        active_record = await db.run(lambda manager: pending_active_record(manager, data['user_id'], warehouse))
+    if not active_record:
+        active_record = data['active_record']
+
+    return 200, bootstrap_body(warehouse, data, active_record, request.arg('catalog_version'))
+
+
+@route('POST', '/api/timer/start')
+async def start_timer(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    data = request.get_json()
+
+    if not data or not data.get('client_id'):
+        return 400, {'error': 'client_id je povinný'}
+
+    warehouse = current_user['warehouse']
+
+    def start(manager):
+        user = manager.get_user_by_username(current_user['username'])
+        if not user:
+            return None, ('Používateľ nenájdený', 404)
+
+        client_id, error = timer_client_id(manager, warehouse, data['client_id'])
+        if error:
+            return None, error
+
+        # Pri write-behind len zápis do žurnálu, ID je provizórne
+        if timer_journal:
+            record_id = timer_journal.start(user[0], client_id, warehouse=warehouse)
+            manager.recent_usage.record_start(user[0], client_id, record_id)
+            return record_id, None
+        return manager.start_time_record(user[0], client_id), None
+
+    record_id, error = await db.run(start)
+
+    if error:
+        return error[1], {'error': error[0]}
+    if not record_id:
+        return 500, {'error': 'Nepodarilo sa spustiť časovač'}
+
+    return 200, {
+        'success': True,
+        'record_id': record_id,
+        'message': 'Časovač spustený'
+    }
+
+
+@route('POST', '/api/timer/stop')
+async def stop_timer(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    data = request.get_json()
+
+    record_id, error = timer_record_id(data)
+    if error:
+        return error[1], {'error': error[0]}
+
+    task_id = data.get('task_id')
+    custom_task_name = data.get('custom_task_name')
+    warehouse = current_user['warehouse']
+
+    def stop(manager):
+        if timer_journal:
+            success = timer_journal.end(record_id, task_id, custom_task_name, warehouse=warehouse)
+            manager.recent_usage.record_end(record_id, task_id, custom_task_name)
+            return success
+        return manager.end_time_record(record_id, task_id, custom_task_name)
+
+    if not await db.run(stop):
+        return 500, {'error': 'Nepodarilo sa zastaviť časovač'}
+
+    return 200, {
+        'success': True,
+        'message': 'Časovač zastavený'
+    }
+
+
+@route('POST', '/api/timer/cancel')
+async def cancel_timer(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    record_id, error = timer_record_id(request.get_json())
+    if error:
+        return error[1], {'error': error[0]}
+
+    warehouse = current_user['warehouse']
+
+    def cancel(manager):
+        if timer_journal:
+            success = timer_journal.cancel(record_id, warehouse=warehouse)
+            manager.recent_usage.record_cancel(record_id)
+            return success
+        return manager.cancel_time_record(record_id)
+
+    if not await db.run(cancel):
+        return 500, {'error': 'Nepodarilo sa zrušiť časovač'}
+
+    return 200, {
+        'message': 'Časovač zrušený',
+        'cancelled': True
+    }
+
+
+@route('GET', '/api/timer/active')
+async def get_active_timer(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+
+    def active(manager):
+        user = manager.get_user_by_username(current_user['username'])
+        if not user:
+            return None
+
+        active_record = None
+        if timer_journal:
+            active_record = pending_active_record(manager, user[0], warehouse)
+        if not active_record:
+            active_record = manager.get_active_time_record(user[0])
+        return active_timer_json(active_record, warehouse)
+
+    body = await db.run(active)
+
+    if body is None:
+        return not_found_user()
+
+    return 200, body
+
+
+@route('GET', '/api/timer/history')
+async def get_timer_history(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    limit = request.arg('limit', 10, type=int)
+
+    def history(manager):
+        user = manager.get_user_by_username(current_user['username'])
+        if not user:
+            return None
+        return manager.get_user_time_records(user[0], limit, row_format='tuple')
+
+    records = await db.run(history)
+
+    if records is None:
+        return not_found_user()
+
+    return 200, rows_body('records', HISTORY_COLUMNS, records, None, request.arg('fields'), request.arg('format'))
+
+
+@route('GET', '/api/me/recent')
+async def get_recent(request, current_user):
+    db = async_shards.for_warehouse(current_user['warehouse'])
+
+    warehouse = current_user['warehouse']
+    limit = min(max(request.arg('limit', 5, type=int), 1), 20)
+
+    def recent(manager):
+        user = manager.get_user_by_username(current_user['username'])
+        if not user:
+            return None
+        return recent_body(manager, user[0], warehouse, limit)
+
+    body = await db.run(recent)
+
+    if body is None:
+        return not_found_user()
+
+    return 200, body
+
+# ============================================
+# ASGI APLIKÁCIA
+# ============================================
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            start_background_workers()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def admit(route_class):
+    """Miesto v triede endpointov - None pri prijatí, inak HTTP status odmietnutia"""
+    if route_class.try_acquire():
+        return None
+    # Čakanie vo fronte triedy blokuje vlákno, nie event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(admission_executor, route_class.acquire)
+
+
+async def handle(handler, auth, request):
+    """Admission control, overenie tokenu a handler - vráti (výsledok, current_user)"""
+    # Admission control ako before_request Flask aplikácie - trieda podľa názvu handlera
+    route_class = admission.class_for(handler.__name__)
+    if route_class is not None:
+        rejected = await admit(route_class)
+        if rejected:
+            return (rejected, {'error': 'Server je preťažený, skús to znova neskôr'},
+                    {'Retry-After': route_class.retry_after}), None
+
+    try:
+        if not auth:
+            return await handler(request), None
+
+        current_user, error = decode_token(request.headers.get('authorization'))
+        if error:
+            return (401, {'error': error}), None
+        return await handler(request, current_user), current_user
+    except PoolTimeout:
+        return (503, {'error': 'Server je preťažený, skús to znova neskôr'}, {'Retry-After': 1}), None
+    finally:
+        if route_class is not None:
+            route_class.release()
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    entry = ROUTES.get((scope['method'], scope['path']))
+    if entry is None:
+        await wsgi_fallback(scope, body, send)
+        return
+
+    handler, auth = entry
+    request = Request(scope, body)
+    # Zachytávanie prevádzky ako hooky TrafficCapture vo Flasku (vrátane čakania v admission)
+    capture_start = traffic_capture.start() if traffic_capture else None
+
+    result, current_user = await handle(handler, auth, request)
+    size = await send_json(send, request, *result)
+
+    if capture_start is not None:
+        status, response_body = result[0], result[1]
+        record_id = response_body.get('record_id') if handler is start_timer and status == 200 else None
+        traffic_capture.write(
+            capture_start, request.method, request.path, request.path, handler.__name__, current_user,
+            ((name, values[0]) for name, values in request.query.items()), request.get_json(),
+            status, size, record_id
+        )
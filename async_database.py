@@ -0,0 +1,135 @@
+"""
+Asynchrónne API nad DatabaseManager pre ASGI server (asgi_server.py)
+Každý shard má vlastný pool pripojení; blokujúce volania mysql.connector
+bežia na vláknach poolu, event loop nikdy nečaká na databázu. Nečinné spojenia
+hodiniek (polling) tak nezaberajú vlákno ani pripojenie do DB.
+
+    db = AsyncDatabaseManager(DatabaseManager())
+    clients = await db.get_clients('Sklad 1')
+    user_id = await db.run(lambda manager: manager.get_user_by_username('jan')[0])
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from database import DatabaseManager, SHARED_STATE
+
+# Počet pripojení (a vlákien) v poole jedného shardu
+ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', 16))
+# Max. čakanie na voľné pripojenie v sekundách, potom PoolTimeout (503)
+ASYNC_DB_ACQUIRE_TIMEOUT = float(os.environ.get('ASYNC_DB_ACQUIRE_TIMEOUT', 5))
+
+
+class PoolTimeout(Exception):
+    """Všetky pripojenia poolu sú obsadené dlhšie ako ASYNC_DB_ACQUIRE_TIMEOUT"""
+
+
+class AsyncDatabaseManager:
+    """
+    Async verzia API DatabaseManager - await db.<metóda>(...) pre každú verejnú metódu.
+    manager je synchrónny DatabaseManager shardu: z neho sa berie konfigurácia
+    a in-memory stav (index klientov, recent usage, single-flight, cache reportov),
+    aby sync (Flask) a async server videli to isté.
+    """
+
+    def __init__(self, manager, pool_size=ASYNC_DB_POOL_SIZE, acquire_timeout=ASYNC_DB_ACQUIRE_TIMEOUT):
+        self.manager = manager
+        self.pool_size = pool_size
+        self.acquire_timeout = acquire_timeout
+        for name in SHARED_STATE:
+            setattr(self, name, getattr(manager, name))
+
+        self._executor = ThreadPoolExecutor(pool_size, thread_name_prefix='async-db')
+        self._idle = deque()
+        self._semaphore = None
+        self._methods = {}
+        self.created = 0
+        self.timeouts = 0
+
+    def _new_manager(self):
+        """Nové pripojenie do poolu so zdieľaným in-memory stavom shardu (loadery viaže _call)"""
+        return self.manager.sharing_state()
+
+    def _call(self, fn):
+        # Beží na vlákne poolu - pripojenie sa vytvára tu, nie v event loope
+        pooled = self._idle.popleft() if self._idle else None
+        if pooled is None:
+            pooled = self._new_manager()
+            self.created += 1
+        # Zdieľané cache (index klientov, recent usage, živá tabuľa) načítavajú cez
+        # pripojenie tohto vlákna, nie cez jediné pripojenie sync managera
+        self.manager.bind_loaders(pooled)
+        try:
+            return fn(pooled)
+        finally:
+            self.manager.bind_loaders(None)
+            self._idle.append(pooled)
+
+    async def run(self, fn):
+        """fn(manager) na vlastnom pripojení z poolu, pre viac volaní naraz"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.pool_size)
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeout()
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._call, fn)
+        finally:
+            self._semaphore.release()
+
+    def __getattr__(self, name):
+        method = getattr(DatabaseManager, name, None)
+        if name.startswith('_') or not callable(method):
+            raise AttributeError(name)
+
+        wrapper = self._methods.get(name)
+        if wrapper is None:
+            async def wrapper(*args, **kwargs):
+                return await self.run(lambda pooled: getattr(pooled, name)(*args, **kwargs))
+            wrapper.__name__ = name
+            wrapper.__doc__ = method.__doc__
+            self._methods[name] = wrapper
+        return wrapper
+
+    def metrics(self):
+        return {
+            'pool_size': self.pool_size,
+            'connections': self.created,
+            'idle': len(self._idle),
+            'timeouts': self.timeouts
+        }
+
+
+class AsyncShardRouter:
+    """Async ShardRouter - AsyncDatabaseManager pre každý shard synchrónneho routera"""
+
+    def __init__(self, router, pool_size=ASYNC_DB_POOL_SIZE):
+        self.router = router
+        self._managers = {
+            name: AsyncDatabaseManager(router.for_shard(name), pool_size)
+            for name in router.shard_names()
+        }
+
+    def for_warehouse(self, warehouse):
+        return self._managers[self.router.shard_name(warehouse)]
+
+    def managers(self):
+        return list(self._managers.values())
+
+    async def verify_user(self, username, password_hash):
+        """Prihlásenie - sklad ešte nepoznáme, skúsime shardy postupne"""
+        for manager in self.managers():
+            user = await manager.verify_user(username, password_hash)
+            if user:
+                return user
+        return None
+
+    def metrics(self):
+        return {name: manager.metrics() for name, manager in self._managers.items()}
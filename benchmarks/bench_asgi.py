@@ -0,0 +1,131 @@
+"""
+Sync (gunicorn + Flask) vs. ASGI (uvicorn + asgi_server) pri tisíckach hodiniek
+Spustenie (lokálna DB s naplneným skladom, používateľ musí existovať):
+
+    gunicorn api_server:app --bind 127.0.0.1:8001
+    uvicorn asgi_server:app --port 8002
+    SECRET_KEY=... python benchmarks/bench_asgi.py --user jan --warehouse "Sklad 1" \\
+        --clients 1000 --interval 1 --duration 30 http://127.0.0.1:8001 http://127.0.0.1:8002
+
+Každý klient drží jedno keep-alive spojenie a v intervale polluje /api/timer/active
+(ako hodinky). Vypíše priepustnosť, percentily latencie a chyby pre každý server.
+Pri 1000+ klientoch treba zvýšiť limit otvorených súborov (ulimit -n 65536).
+
+Oba servery bežia ako jeden proces (žurnál časovačov patrí jednému procesu, viac
+workerov s TIMER_WRITE_BEHIND=1 neštartuje). gunicorn podľa gunicorn.conf.py
+s jedným vláknom - DatabaseManager má jedno pripojenie a nie je bezpečný pre vlákna.
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+import jwt
+
+
+def make_token(username, warehouse, role):
+    return jwt.encode({
+        'username': username,
+        'warehouse': warehouse,
+        'role': role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    }, os.environ.get('SECRET_KEY', 'default-secret-key'), algorithm="HS256")
+
+
+async def read_response(reader):
+    """Status a telo HTTP/1.1 odpovede s Content-Length"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def client(host, port, request, interval, deadline, stats):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats['connect_errors'] += 1
+        return
+
+    # Hodinky sa nepripájajú naraz - rozloženie prvého pollu v rámci intervalu
+    await asyncio.sleep(random.uniform(0, interval))
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, _ = await read_response(reader)
+            stats['latencies'].append(time.perf_counter() - start)
+            if status != 200:
+                stats['errors'][status] = stats['errors'].get(status, 0) + 1
+            await asyncio.sleep(interval)
+    except (OSError, asyncio.IncompleteReadError):
+        stats['dropped'] += 1
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(url, args, token):
+    parts = urlsplit(url)
+    request = (
+        f"GET {args.path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        f"Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    stats = {'latencies': [], 'errors': {}, 'connect_errors': 0, 'dropped': 0}
+    started = time.monotonic()
+    deadline = started + args.duration
+    await asyncio.gather(*(
+        client(parts.hostname, parts.port or 80, request, args.interval, deadline, stats)
+        for _ in range(args.clients)
+    ))
+    elapsed = time.monotonic() - started
+
+    latencies = sorted(stats['latencies'])
+    print(f"{url}  klienti: {args.clients}, interval: {args.interval} s")
+    print(f"  requesty: {len(latencies)} ({len(latencies) / elapsed:.0f}/s), chyby: {stats['errors']}, "
+          f"neúspešné spojenia: {stats['connect_errors']}, prerušené: {stats['dropped']}")
+    print(f"  latencia ms  p50: {percentile(latencies, 0.5) * 1000:.1f}  "
+          f"p95: {percentile(latencies, 0.95) * 1000:.1f}  "
+          f"p99: {percentile(latencies, 0.99) * 1000:.1f}  "
+          f"max: {(latencies[-1] if latencies else 0) * 1000:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='+', help='servery na porovnanie, napr. http://127.0.0.1:8001')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--warehouse', required=True)
+    parser.add_argument('--role', default='user')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--interval', type=float, default=1.0, help='sekundy medzi pollmi klienta')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--path', default='/api/timer/active')
+    args = parser.parse_args()
+
+    token = make_token(args.user, args.warehouse, args.role)
+    for url in args.urls:
+        asyncio.run(run(url, args, token))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
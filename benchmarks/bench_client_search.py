@@ -0,0 +1,54 @@
+"""
+Benchmark: type-ahead vyhľadávanie klientov z in-memory indexu
+Spustenie: python benchmarks/bench_client_search.py
+
+Nepotrebuje databázu - index sa naplní syntetickými slovenskými názvami.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from client_search import ClientSearchIndex
+
+CLIENTS = int(os.environ.get('BENCH_CLIENTS', 1000))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 20000))
+
+PREFIXES = ['Košický', 'Žilinský', 'Bratislavský', 'Prešovský', 'Nitriansky', 'Trenčiansky']
+NOUNS = ['Obchod', 'Sklad', 'Pekáreň', 'Mäsiarstvo', 'Stavebniny', 'Záhradníctvo', 'Lekáreň']
+SUFFIXES = ['s.r.o.', 'a.s.', 'k.s.', 'družstvo']
+QUERIES = ['kos', 'zil', 'pekar', 'masi', 'stav s', 'lekaren', 'zahrad', 'presov obc', 'sklda']
+
+
+def synthetic_clients(count):
+    rng = random.Random(42)
+    return [
+        (i, f"{rng.choice(PREFIXES)} {rng.choice(NOUNS)} {i} {rng.choice(SUFFIXES)}")
+        for i in range(1, count + 1)
+    ]
+
+
+def main():
+    clients = synthetic_clients(CLIENTS)
+    index = ClientSearchIndex(lambda warehouse: clients, ttl=3600)
+
+    start = time.perf_counter()
+    index.search('Sklad 1', 'x')
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        index.search('Sklad 1', QUERIES[i % len(QUERIES)], limit=10)
+    per_query_us = (time.perf_counter() - start) / ITERATIONS * 1e6
+
+    print(f"klienti: {CLIENTS}, build indexu: {build_ms:.1f} ms")
+    print(f"priemerný dotaz (top-10): {per_query_us:.1f} us")
+    for query in QUERIES[:3]:
+        print(f"  {query!r}: {[name for _, name in index.search('Sklad 1', query, limit=3)]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark: veľkosť odpovedí /api/clients pre hodinky
+Spustenie: python benchmarks/bench_compact_responses.py
+
+Porovnáva štandardný formát, sparse fieldsets, columnar formát a gzip
+pri veľkostiach zoznamov typických pre sklad. Nepotrebuje databázu.
+"""
+
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compact import compact_list
+
+SIZES = [20, 100, 500, 2000]
+WAREHOUSE = 'Sklad Bratislava'
+
+
+def payload(body):
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def main():
+    print(f"{'klienti':>8}{'verbose':>10}{'fields':>10}{'columnar':>10}{'+gzip':>10}{'úspora':>9}")
+    for size in SIZES:
+        items = [{'id': i, 'name': f"Klient č. {i} s.r.o."} for i in range(1, size + 1)]
+
+        verbose = payload({'clients': [{**item, 'warehouse': WAREHOUSE} for item in items]})
+        fields = payload({'clients': compact_list(items, ['id', 'name']), 'warehouse': WAREHOUSE})
+        columnar = payload({'clients': compact_list(items, columnar=True), 'warehouse': WAREHOUSE})
+        columnar_gzip = gzip.compress(columnar, compresslevel=6)
+
+        saving = (1 - len(columnar_gzip) / len(verbose)) * 100
+        print(f"{size:>8}{len(verbose):>10}{len(fields):>10}{len(columnar):>10}"
+              f"{len(columnar_gzip):>10}{saving:>8.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Kódovanie veľkých odpovedí (história, reporty) do JSON
+Spustenie: python benchmarks/bench_json_encoding.py [počet_riadkov ...]
+
+Porovnáva pôvodnú cestu (dict z kurzora -> dict odpovede s .isoformat()
+-> predvolený Flask JSON provider) s priamym kódovaním riadkov (rows_compact)
+cez IsoJSONProvider (štandardný json) a OrjsonProvider, aj v columnar forme.
+Nepotrebuje databázu.
+
+Výsledky (10k / 100k riadkov, Python 3.11, orjson 3.8):
+
+    história (5 stĺpcov)                   10k        100k
+      pôvodne (dict + Flask json)        60 ms      663 ms
+      riadky + štandardný json           74 ms      662 ms
+      riadky + orjson                    10 ms      162 ms
+      riadky + orjson columnar            4 ms       84 ms
+    report (11 stĺpcov)
+      pôvodne (dict + Flask json)        79 ms      913 ms
+      riadky + štandardný json           70 ms      842 ms
+      riadky + orjson                    24 ms      333 ms
+      riadky + orjson columnar            6 ms      109 ms
+
+Bez orjson priame riadky nezrýchlia (datetime kóduje Python callback),
+zisk je z orjson - ten kóduje datetime natívne.
+"""
+
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from compact import rows_compact
+from json_provider import IsoJSONProvider, OrjsonProvider, orjson
+from report_rows import REPORT_COLUMNS, build_report_rows, report_rows_compact
+
+ROW_COUNTS = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+REPEAT = 3
+
+HISTORY_COLUMNS = ('record_id', 'client_name', 'start_time', 'end_time', 'duration_seconds')
+
+
+def history_rows(count):
+    start = datetime.datetime(2024, 5, 1, 6, 0)
+    return [
+        (i, f"Klient {i % 300}", start + datetime.timedelta(minutes=i),
+         start + datetime.timedelta(minutes=i + 7), 420)
+        for i in range(count)
+    ]
+
+
+def report_rows(count):
+    start = datetime.datetime(2024, 5, 1, 6, 0)
+    return [
+        (i, 'Sklad 1', f"user{i % 80}", f"Používateľ {i % 80}", f"Klient {i % 300}",
+         f"Úkon {i % 25}", None, start + datetime.timedelta(minutes=i),
+         start + datetime.timedelta(minutes=i + 7), 420, '')
+        for i in range(count)
+    ]
+
+
+def history_before(provider, rows):
+    # Dict z kurzora (dictionary=True) a dict odpovede s .isoformat() na každý dátum
+    records = [
+        {'id': row[0], 'client_name': row[1], 'start_time': row[2], 'end_time': row[3],
+         'duration_seconds': row[4], 'description': ''}
+        for row in rows
+    ]
+    body = {'records': [
+        {
+            'record_id': rec['id'],
+            'client_name': rec['client_name'],
+            'start_time': rec['start_time'].isoformat() if rec['start_time'] else None,
+            'end_time': rec['end_time'].isoformat() if rec['end_time'] else None,
+            'duration_seconds': rec['duration_seconds']
+        }
+        for rec in records
+    ]}
+    return provider.response(body).get_data()
+
+
+def report_before(provider, rows):
+    records = [dict(zip(REPORT_COLUMNS, row)) for row in rows]
+    body = {'records': [
+        {
+            **rec,
+            'start_time': rec['start_time'].isoformat() if rec['start_time'] else None,
+            'end_time': rec['end_time'].isoformat() if rec['end_time'] else None
+        }
+        for rec in records
+    ]}
+    return provider.response(body).get_data()
+
+
+def measure(fn):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        data = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(data)
+
+
+def main():
+    app = Flask(__name__)
+    flask_default = DefaultJSONProvider(app)
+    iso = IsoJSONProvider(app)
+    fast = OrjsonProvider(app) if orjson else None
+    if fast is None:
+        print("orjson nie je nainštalovaný - merajú sa len štandardné providery")
+
+    for count in ROW_COUNTS:
+        history = history_rows(count)
+        report = build_report_rows(report_rows(count), 'tuple')
+
+        cases = [
+            ('história: pôvodne (dict + Flask json)', lambda: history_before(flask_default, history)),
+            ('história: riadky + štandardný json',
+             lambda: iso.response({'records': rows_compact(HISTORY_COLUMNS, history)}).get_data()),
+            ('report: pôvodne (dict + Flask json)', lambda: report_before(flask_default, report)),
+            ('report: riadky + štandardný json',
+             lambda: iso.response({'records': report_rows_compact(report)}).get_data()),
+        ]
+        if fast:
+            cases[2:2] = [
+                ('história: riadky + orjson',
+                 lambda: fast.response({'records': rows_compact(HISTORY_COLUMNS, history)}).get_data()),
+                ('história: riadky + orjson columnar',
+                 lambda: fast.response({'records': rows_compact(HISTORY_COLUMNS, history, columnar=True)}).get_data()),
+            ]
+            cases += [
+                ('report: riadky + orjson',
+                 lambda: fast.response({'records': report_rows_compact(report)}).get_data()),
+                ('report: riadky + orjson columnar',
+                 lambda: fast.response({'records': report_rows_compact(report, columnar=True)}).get_data()),
+            ]
+
+        print(f"\n{count} riadkov")
+        for name, fn in cases:
+            elapsed, size = measure(fn)
+            print(f"  {name:<40} {elapsed * 1000:>8.1f} ms  {size / 1024 / 1024:>7.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: textový protokol vs. server-side prepared statements
+Spustenie: DB_HOST=... DB_NAME=... python benchmarks/bench_prepared_statements.py [warehouse] [user_id]
+
+Porovnáva čas horúcich dotazov (get_clients, get_active_time_record)
+poslaných zakaždým ako celý SQL text a cez pripravený kurzor.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from database import DB_CONFIG, GET_CLIENTS_QUERY, GET_ACTIVE_TIME_RECORD_QUERY
+
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 2000))
+
+
+def run_text(connection, query, params):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        cursor.close()
+    return time.perf_counter() - start
+
+
+def run_prepared(connection, query, params):
+    start = time.perf_counter()
+    cursor = connection.cursor(prepared=True)
+    for _ in range(ITERATIONS):
+        cursor.execute(query, params)
+        cursor.fetchall()
+    cursor.close()
+    return time.perf_counter() - start
+
+
+def main():
+    warehouse = sys.argv[1] if len(sys.argv) > 1 else 'Sklad 1'
+    user_id = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+
+    cases = [
+        ('get_clients', GET_CLIENTS_QUERY, (warehouse,)),
+        ('get_active_time_record', GET_ACTIVE_TIME_RECORD_QUERY, (user_id,)),
+    ]
+
+    print(f"{'dotaz':<26}{'text [us]':>12}{'prepared [us]':>16}{'úspora':>10}")
+    for name, query, params in cases:
+        text_time = run_text(connection, query, params)
+        prepared_time = run_prepared(connection, query, params)
+        text_us = text_time / ITERATIONS * 1e6
+        prepared_us = prepared_time / ITERATIONS * 1e6
+        saving = (1 - prepared_time / text_time) * 100
+        print(f"{name:<26}{text_us:>12.1f}{prepared_us:>16.1f}{saving:>9.1f}%")
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: pamäť riadkov reportu pri 1 000 000 záznamoch
+Spustenie: python benchmarks/bench_report_rows.py [počet_riadkov]
+
+Porovnáva dict na riadok (row_format='dict'), TimeRecordRow s internovanými
+reťazcami ('tuple') a stĺpcovú dávku ReportColumns ('columns').
+Riadky sa generujú synteticky ako nové reťazce pre každý riadok,
+rovnako ako ich vracia mysql.connector. Nepotrebuje databázu.
+Čas je meraný so zapnutým tracemalloc, slúži len na relatívne porovnanie.
+
+Namerané (1 000 000 riadkov, CPython 3.11):
+    dict      848 MB   890 B/riadok
+    tuple     245 MB   257 B/riadok   (29 %)
+    columns   196 MB   205 B/riadok   (23 %)
+"""
+
+import datetime
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_rows import REPORT_COLUMNS, build_report_rows
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def synthetic_rows(count):
+    start = datetime.datetime(2026, 1, 1, 6, 0)
+    for i in range(count):
+        user = i % 40
+        begin = start + datetime.timedelta(minutes=i)
+        yield (
+            i + 1,
+            ''.join(['Sklad ', 'Bratislava']),
+            ''.join(['user', str(user)]),
+            ''.join(['Meno Priezvisko ', str(user)]),
+            ''.join(['Klient ', str(i % 300), ' s.r.o.']),
+            ''.join(['Úkon ', str(i % 25)]) if i % 3 else None,
+            None,
+            begin,
+            begin + datetime.timedelta(minutes=30),
+            1800,
+            '',
+        )
+
+
+def build(row_format):
+    if row_format == 'dict':
+        return [dict(zip(REPORT_COLUMNS, row)) for row in synthetic_rows(ROWS)]
+    return build_report_rows(synthetic_rows(ROWS), row_format)
+
+
+def measure(row_format):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(row_format)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return current, elapsed
+
+
+def main():
+    print(f"riadkov: {ROWS:,}")
+    print(f"{'row_format':<12}{'pamäť [MB]':>12}{'B/riadok':>10}{'čas [s]':>10}")
+    baseline = None
+    for row_format in ('dict', 'tuple', 'columns'):
+        size, elapsed = measure(row_format)
+        baseline = baseline or size
+        print(f"{row_format:<12}{size / 2**20:>12.1f}{size / ROWS:>10.0f}{elapsed:>10.2f}"
+              f"   ({size / baseline * 100:.0f} % oproti dict)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Súbežnosť: zlučovanie rovnakých čítaní (single-flight)
+Spustenie: python benchmarks/bench_single_flight.py [počet_vlákien]
+
+Simuluje štart zmeny - veľa hodiniek naraz volá get_clients pre ten istý sklad
+nad pomalým (studeným) dotazom. Overí, že do DB išiel jediný dotaz a všetci
+volajúci dostali jeho výsledok. Nepotrebuje databázu.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight, coalesced
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+QUERY_SECONDS = 0.2
+
+
+class SlowCatalog:
+    """Náhrada DatabaseManager s pomalým dotazom, počíta skutočné vykonania"""
+
+    def __init__(self):
+        self.single_flight = SingleFlight()
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    @coalesced
+    def get_clients(self, warehouse):
+        with self._lock:
+            self.queries += 1
+        time.sleep(QUERY_SECONDS)
+        return [(1, 'Klient A', warehouse), (2, 'Klient B', warehouse)]
+
+
+def main():
+    catalog = SlowCatalog()
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+
+    def worker(index):
+        barrier.wait()
+        results[index] = catalog.get_clients('Sklad 1')
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    metrics = catalog.single_flight.metrics()['get_clients']
+    print(f"vlákna: {THREADS}, dotazy do DB: {catalog.queries}, čas: {elapsed:.2f} s")
+    print(f"metriky: {metrics}")
+
+    assert catalog.queries == 1, f"očakávaný 1 dotaz, vykonaných {catalog.queries}"
+    assert all(result is results[0] for result in results), "volajúci nedostali zdieľaný výsledok"
+    print("OK - všetky súbežné volania zdieľali jeden dotaz")
+
+
+if __name__ == '__main__':
+    main()
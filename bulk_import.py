@@ -0,0 +1,84 @@
+"""
+Hromadný import používateľov, klientov a úkonov (CSV alebo JSON)
+Parsovanie a validácia vstupu pred zápisom do databázy
+"""
+
+import csv
+import io
+import json
+import os
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+IMPORT_KINDS = {
+    'users': {'required': ('username', 'password', 'full_name'), 'key': 'username'},
+    'clients': {'required': ('client_name',), 'key': 'client_name'},
+    'tasks': {'required': ('task_name',), 'key': 'task_name'},
+}
+
+USER_ROLES = ('user', 'admin')
+
+
+class ImportFormatError(ValueError):
+    """Vstup sa nedá načítať (zlý formát CSV/JSON)"""
+
+
+def parse_rows(body, content_type):
+    """Riadky importu ako zoznam dict-ov z CSV (s hlavičkou) alebo JSON"""
+    if 'csv' in (content_type or ''):
+        try:
+            text = body.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFormatError('CSV musí byť v kódovaní UTF-8')
+        sample = text[:2048]
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        return [dict(row) for row in csv.DictReader(io.StringIO(text), dialect=dialect)]
+
+    try:
+        data = json.loads(body or b'null')
+    except ValueError:
+        raise ImportFormatError('Neplatný JSON')
+    if isinstance(data, dict):
+        data = data.get('rows')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ImportFormatError('Očakávaný zoznam objektov alebo {"rows": [...]}')
+    return data
+
+
+def validate_rows(kind, rows):
+    """
+    Kontrola povinných polí a duplicít v rámci vstupu.
+    Vráti (valid, errors) - valid je zoznam (číslo_riadku, riadok), čísla od 1.
+    """
+    spec = IMPORT_KINDS[kind]
+    valid = []
+    errors = []
+    seen = {}
+
+    for row_number, raw in enumerate(rows, start=1):
+        row = {key.strip(): str(value).strip() for key, value in raw.items()
+               if key and value is not None}
+
+        missing = [field for field in spec['required'] if not row.get(field)]
+        if missing:
+            errors.append({'row': row_number, 'error': f"Chýbajúce polia: {', '.join(missing)}"})
+            continue
+
+        if kind == 'users':
+            row['role'] = row.get('role') or 'user'
+            if row['role'] not in USER_ROLES:
+                errors.append({'row': row_number, 'error': f"Neplatná rola: {row['role']}"})
+                continue
+
+        key = row[spec['key']].casefold()
+        if key in seen:
+            errors.append({'row': row_number, 'error': f"Duplicita s riadkom {seen[key]}"})
+            continue
+        seen[key] = row_number
+
+        valid.append((row_number, row))
+
+    return valid, errors
@@ -0,0 +1,241 @@
+"""
+In-memory index klientov pre type-ahead vyhľadávanie na hodinkách
+Prefixový a trigramový index nad client_name, samostatne pre každý sklad
+"""
+
+import heapq
+import os
+import threading
+import time
+import unicodedata
+
+# Po koľkých sekundách sa index skladu načíta z DB znova
+# (klientov môže meniť aj desktop dashboard mimo tohto procesu)
+CLIENT_SEARCH_TTL = int(os.environ.get('CLIENT_SEARCH_TTL', 300))
+# Klient chýbajúci v indexe staršom ako toto (sekundy) sa overí novým načítaním
+CLIENT_RECHECK_AGE = 5
+
+
+def normalize(text):
+    """Normalizácia textu pre porovnávanie - bez diakritiky, malé písmená"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def trigrams(text):
+    """Množina trigramov normalizovaného textu (s okrajovými medzerami)"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _WarehouseIndex:
+    """Index klientov jedného skladu"""
+
+    def __init__(self):
+        self.names = {}        # client_id -> pôvodný názov
+        self.normalized = {}   # client_id -> normalizovaný názov
+        self.prefixes = {}     # prefix slova -> set(client_id)
+        self.trigrams = {}     # trigram -> set(client_id)
+        self.loaded_at = time.monotonic()
+
+    def add(self, client_id, client_name):
+        if client_id in self.names:
+            self.remove(client_id)
+
+        norm = normalize(client_name)
+        self.names[client_id] = client_name
+        self.normalized[client_id] = norm
+
+        for word in norm.split():
+            for i in range(1, len(word) + 1):
+                self.prefixes.setdefault(word[:i], set()).add(client_id)
+        for gram in trigrams(norm):
+            self.trigrams.setdefault(gram, set()).add(client_id)
+
+    def remove(self, client_id):
+        norm = self.normalized.pop(client_id, None)
+        if norm is None:
+            return
+        del self.names[client_id]
+
+        for word in norm.split():
+            for i in range(1, len(word) + 1):
+                self._discard(self.prefixes, word[:i], client_id)
+        for gram in trigrams(norm):
+            self._discard(self.trigrams, gram, client_id)
+
+    @staticmethod
+    def _discard(mapping, key, client_id):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(client_id)
+            if not ids:
+                del mapping[key]
+
+    def search(self, query, limit):
+        words = query.split()
+
+        # 1. Každé slovo dotazu musí byť prefixom niektorého slova v názve
+        matched = None
+        for word in words:
+            ids = self.prefixes.get(word, set())
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        matched = matched or set()
+
+        # Najprv názvy začínajúce celým dotazom, potom abecedne
+        results = heapq.nsmallest(
+            limit,
+            matched,
+            key=lambda cid: (not self.normalized[cid].startswith(query), self.normalized[cid])
+        )
+
+        # 2. Doplnenie podobných názvov podľa zhody trigramov (preklepy, podreťazce)
+        if len(results) < limit:
+            query_grams = trigrams(query)
+            scores = {}
+            for gram in query_grams:
+                for cid in self.trigrams.get(gram, ()):
+                    if cid not in matched:
+                        scores[cid] = scores.get(cid, 0) + 1
+            threshold = max(1, len(query_grams) // 2)
+            similar = heapq.nsmallest(
+                limit - len(results),
+                (cid for cid, score in scores.items() if score >= threshold),
+                key=lambda cid: (-scores[cid], self.normalized[cid])
+            )
+            results.extend(similar)
+
+        return [(cid, self.names[cid]) for cid in results]
+
+
+class ClientSearchIndex:
+    """Vyhľadávací index klientov pre všetky sklady, načítavaný lenivo z DB"""
+
+    def __init__(self, loader, ttl=CLIENT_SEARCH_TTL):
+        # loader(warehouse) vráti zoznam (id, client_name, ...) aktívnych klientov,
+        # None pri chybe DB (prázdny zoznam je platný stav - sklad bez klientov)
+        self._loader = loader
+        self._ttl = ttl
+        self._warehouses = {}
+        self._loading = {}   # sklad -> Event práve bežiaceho načítania
+        self._versions = {}  # sklad -> počet zmien (add/remove/invalidate)
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _get(self, warehouse):
+        """
+        Index skladu. Načítanie z DB beží mimo zámku indexu, takže pomalý sklad
+        neblokuje vyhľadávanie v ostatných; súbežné načítania skladu čakajú na jedno.
+        """
+        with self._lock:
+            index = self._warehouses.get(warehouse)
+            if index is not None and time.monotonic() - index.loaded_at <= self._ttl:
+                return index
+            loading = self._loading.get(warehouse)
+            if loading is not None and index is not None:
+                # Expirovaný index slúži, kým ho iné vlákno načíta znova
+                return index
+            leader = loading is None
+            if leader:
+                loading = self._loading[warehouse] = threading.Event()
+                version = self._versions.get(warehouse, 0)
+
+        if not leader:
+            loading.wait()
+            with self._lock:
+                return self._warehouses.get(warehouse) or _WarehouseIndex()
+
+        fresh = None
+        try:
+            clients = self._loader(warehouse)
+            if clients is not None:
+                fresh = _WarehouseIndex()
+                for client in clients:
+                    fresh.add(client[0], client[1])
+        finally:
+            with self._lock:
+                if fresh is not None:
+                    self.loads += 1
+                    if self._versions.get(warehouse, 0) != version:
+                        # Klient pridaný/odstránený počas načítania - pri ďalšom hľadaní znova
+                        fresh.loaded_at = float('-inf')
+                    self._warehouses[warehouse] = fresh
+                del self._loading[warehouse]
+            loading.set()
+
+        # Chyba DB - necacheuje sa, slúži starý index (ak bol) alebo prázdny
+        return fresh or index or _WarehouseIndex()
+
+    def _changed(self, warehouse):
+        # Volá sa pod zámkom
+        self._versions[warehouse] = self._versions.get(warehouse, 0) + 1
+
+    def search(self, warehouse, query, limit=10):
+        """Top-k klientov skladu zodpovedajúcich dotazu ako [(id, client_name)]"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        index = self._get(warehouse)
+        with self._lock:
+            return index.search(query, limit)
+
+    def lookup(self, warehouse, client_ids):
+        """Názvy aktívnych klientov podľa ID ako {id: client_name}, neaktívni chýbajú"""
+        index = self._get(warehouse)
+        with self._lock:
+            return {cid: index.names[cid] for cid in client_ids if cid in index.names}
+
+    def contains(self, warehouse, client_id):
+        """
+        Či je klient aktívny v sklade (napr. pred štartom časovača do žurnálu).
+        None ak sa index nedá načítať (chyba DB) - vtedy to nevieme overiť.
+        """
+        index = self._get(warehouse)
+        with self._lock:
+            if client_id in index.names:
+                return True
+            if warehouse not in self._warehouses:
+                return None
+            recheck = time.monotonic() - index.loaded_at > CLIENT_RECHECK_AGE
+
+        if recheck:
+            # Klienta mohol pridať desktop dashboard mimo tohto procesu
+            self.invalidate(warehouse)
+            index = self._get(warehouse)
+            with self._lock:
+                if client_id in index.names:
+                    return True
+                if warehouse not in self._warehouses:
+                    return None
+        return False
+
+    def add(self, warehouse, client_id, client_name):
+        """Inkrementálne pridanie klienta (ak je index skladu už načítaný)"""
+        with self._lock:
+            self._changed(warehouse)
+            index = self._warehouses.get(warehouse)
+            if index is not None:
+                index.add(client_id, client_name)
+
+    def remove(self, warehouse, client_id):
+        """Inkrementálne odstránenie klienta z indexu skladu"""
+        with self._lock:
+            self._changed(warehouse)
+            index = self._warehouses.get(warehouse)
+            if index is not None:
+                index.remove(client_id)
+
+    def invalidate(self, warehouse=None):
+        """Zahodenie indexu skladu (alebo všetkých), pri ďalšom hľadaní sa načíta znova"""
+        with self._lock:
+            if warehouse is None:
+                self._warehouses.clear()
+                for name in self._loading:
+                    self._changed(name)
+            else:
+                self._warehouses.pop(warehouse, None)
+                self._changed(warehouse)
@@ -0,0 +1,59 @@
+"""
+Kompaktné reprezentácie zoznamov pre hodinky
+Columnar formát ({"id": [...], "name": [...]}) a sparse fieldsets (?fields=)
+"""
+
+
+def parse_fields(value):
+    """Zoznam požadovaných polí z ?fields=id,name (None ak nie sú zadané)"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    return fields or None
+
+
+def select_fields(items, fields):
+    """Sparse fieldset - ponechá v každom objekte len požadované polia"""
+    return [{field: item[field] for field in fields if field in item} for item in items]
+
+
+def to_columnar(items, fields=None, columns=None):
+    """
+    Zoznam objektov -> objekt stĺpcov s rovnakým poradím prvkov
+    columns sú polia objektov - aj prázdny zoznam potom vráti všetky stĺpce
+    """
+    if columns is None and items:
+        columns = list(items[0].keys())
+    if fields is None:
+        fields = list(columns or [])
+    elif columns is not None:
+        fields = [field for field in fields if field in columns]
+    return {field: [item.get(field) for item in items] for field in fields}
+
+
+def compact_list(items, fields=None, columnar=False, columns=None):
+    """Zoznam objektov v požadovanej kompaktnej forme"""
+    if columnar:
+        return to_columnar(items, fields, columns)
+    if fields:
+        return select_fields(items, fields)
+    return items
+
+
+def rows_compact(columns, rows, fields=None, columnar=False):
+    """
+    Riadky z DB (tuple v poradí columns) rovno v tvare compact_list - bez dict-u
+    z kurzora a bez medzikroku cez zoznam objektov. Columnar forma nevytvára
+    žiadny objekt na riadok.
+    """
+    columns = list(columns)
+    if fields:
+        indexes = [columns.index(field) for field in fields if field in columns]
+        columns = [columns[index] for index in indexes]
+        rows = [tuple(row[index] for index in indexes) for row in rows]
+
+    if columnar:
+        if not rows:
+            return {column: [] for column in columns}
+        return {column: list(values) for column, values in zip(columns, zip(*rows))}
+    return [dict(zip(columns, row)) for row in rows]
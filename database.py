@@ -1,7 +1,20 @@
 ﻿import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import DataError, IntegrityError
+import datetime
 import hashlib
+import json
 import os
+import threading
+import time
+from client_search import ClientSearchIndex
+from recent_usage import RecentUsageTracker
+from report_rows import REPORT_COLUMNS, build_report_rows
+from report_cache import ReportDayCache, REPORT_CACHE_MAX_DAYS, day_range, to_date
+from bulk_import import IMPORT_BATCH_SIZE
+from single_flight import SingleFlight, coalesced
+from live_board import LiveBoard
+from timer_journal import TIME_FORMAT
 
 # Načítanie konfigurácie z environment variables
 DB_CONFIG = {
@@ -14,15 +27,129 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Hromadné mazanie záznamov - veľkosť dávky a pauza medzi dávkami (sekundy)
+BULK_DELETE_CHUNK_SIZE = int(os.environ.get('BULK_DELETE_CHUNK_SIZE', 500))
+BULK_DELETE_PAUSE = float(os.environ.get('BULK_DELETE_PAUSE', 0.05))
+# Horné hranice hodnôt zadaných v requeste (veľkosť dávky, pauza v sekundách)
+BULK_DELETE_MAX_CHUNK_SIZE = 5000
+BULK_DELETE_MAX_PAUSE = 5.0
+
+# In-memory stav zdieľaný všetkými pripojeniami shardu (pool ASGI servera, vlákna na pozadí)
+SHARED_STATE = ('single_flight', 'client_search', 'recent_usage', 'report_cache', 'live_board')
+
+# Horúce dotazy posielané ako server-side prepared statements.
+# Kurzor mysql.connector znovu pripraví statement len ak dostane iný objekt
+# reťazca, preto sa tieto konštanty musia odovzdávať vždy tie isté.
+GET_ACTIVE_TIME_RECORD_QUERY = """
+SELECT 
+    tr.id as record_id,
+    c.client_name,
+    tr.start_time,
+    TIMESTAMPDIFF(SECOND, tr.start_time, NOW()) as elapsed_seconds
+FROM time_records tr
+JOIN clients c ON tr.client_id = c.id
+WHERE tr.user_id = %s AND tr.end_time IS NULL
+ORDER BY tr.start_time DESC
+LIMIT 1
+"""
+
+START_TIME_RECORD_QUERY = """
+INSERT INTO time_records (user_id, client_id, start_time, description)
+VALUES (%s, %s, NOW(), %s)
+"""
+
+END_TIME_RECORD_QUERY = """
+UPDATE time_records 
+SET end_time = NOW(), 
+    duration_seconds = TIMESTAMPDIFF(SECOND, start_time, NOW()),
+    task_id = %s,
+    custom_task_name = %s
+WHERE id = %s AND end_time IS NULL
+"""
+
+GET_CLIENTS_QUERY = """
+SELECT id, client_name, warehouse
+FROM clients 
+WHERE warehouse = %s AND is_active = TRUE
+ORDER BY client_name
+"""
+
+# Dáta pre štart hodiniek v jednom multi-statement round trip-e
+BOOTSTRAP_QUERY = """
+SELECT id FROM users WHERE username = %s AND is_active = TRUE;
+SELECT id, client_name FROM clients WHERE warehouse = %s AND is_active = TRUE ORDER BY client_name;
+SELECT id, task_name FROM tasks WHERE warehouse = %s AND is_active = 1 ORDER BY is_predefined DESC, task_name ASC;
+SELECT tr.id, c.client_name, tr.start_time, TIMESTAMPDIFF(SECOND, tr.start_time, NOW())
+FROM time_records tr
+JOIN clients c ON tr.client_id = c.id
+WHERE tr.user_id = (SELECT id FROM users WHERE username = %s AND is_active = TRUE)
+  AND tr.end_time IS NULL
+ORDER BY tr.start_time DESC
+LIMIT 1
+"""
+
+# Riadky reportu skladu v rozsahu [od, do) - pre cache dní (tuple v poradí REPORT_COLUMNS)
+WAREHOUSE_REPORT_RANGE_QUERY = """
+SELECT 
+    tr.id,
+    u.warehouse,
+    u.username,
+    u.full_name,
+    c.client_name,
+    t.task_name,
+    tr.custom_task_name,
+    tr.start_time,
+    tr.end_time,
+    tr.duration_seconds,
+    tr.description
+FROM time_records tr
+JOIN users u ON tr.user_id = u.id
+JOIN clients c ON tr.client_id = c.id
+LEFT JOIN tasks t ON tr.task_id = t.id
+WHERE u.warehouse = %s AND tr.start_time >= %s AND tr.start_time < %s
+ORDER BY tr.start_time DESC
+"""
+
+def shift_event_time(value, offset):
+    """Čas udalosti žurnálu ('%Y-%m-%d %H:%M:%S' podľa API servera) na hodinách DB, na sekundy"""
+    shifted = datetime.datetime.strptime(value, TIME_FORMAT) + offset
+    return (shifted + datetime.timedelta(microseconds=500000)).replace(microsecond=0)
+
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, config=None):
+        # config - konfigurácia pripojenia (napr. pre shard), inak DB_CONFIG
+        self.config = config or DB_CONFIG
         self.connection = None
+        # Cache pripravených kurzorov pre aktuálne pripojenie
+        self._prepared_cursors = {}
+        self._prepared_connection_id = None
+        # Zlučovanie rovnakých súbežných čítaní (@coalesced metódy)
+        self.single_flight = SingleFlight()
+        # Pripojenie pre loadery zdieľaných cache nižšie podľa vlákna (bind_loaders),
+        # inak vlastné - cache zdieľa aj pool AsyncDatabaseManager
+        self._loader_local = threading.local()
+        # In-memory index klientov pre /api/clients/search
+        self.client_search = ClientSearchIndex(lambda warehouse: self._loader_manager().load_clients(warehouse))
+        # Naposledy/najčastejšie používaní klienti a úkony pre /api/me/recent
+        self.recent_usage = RecentUsageTracker(
+            lambda user_id: self._loader_manager().get_recent_usage_history(user_id)
+        )
+        # Uzavreté dni reportov skladu na disku (get_warehouse_time_records)
+        self.report_cache = ReportDayCache()
+        # Otvorené časovače skladu pre /api/warehouse/live (krátke TTL)
+        self.live_board = LiveBoard(
+            lambda warehouse: self._loader_manager().get_open_time_records(warehouse),
+            lambda warehouse: self._loader_manager().get_users_by_warehouse(warehouse)
+        )
         self.connect()
     
     def connect(self):
         """Pripojenie k MySQL databĂˇze"""
+        # Prepared statements patria k pripojeniu, pri novom pripojení ich treba pripraviť znova
+        self._prepared_cursors = {}
+        self._prepared_connection_id = None
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
+            self.connection = mysql.connector.connect(**self.config)
             if self.connection.is_connected():
                 print("ĂšspeĹˇne pripojenĂ© k MySQL databĂˇze")
         except Error as e:
@@ -48,6 +175,47 @@ class DatabaseManager:
             print(f"Chyba pri testovanĂ­ pripojenia: {e}")
             self.connect()
     
+    def sharing_state(self):
+        """Nový DatabaseManager s vlastným pripojením a in-memory stavom tohto managera"""
+        manager = DatabaseManager(self.config)
+        for name in SHARED_STATE:
+            setattr(manager, name, getattr(self, name))
+        return manager
+    
+    def bind_loaders(self, manager):
+        """Loadery cache tohto managera pôjdu v aktuálnom vlákne cez manager (None = cez self)"""
+        self._loader_local.manager = manager
+    
+    def _loader_manager(self):
+        return getattr(self._loader_local, 'manager', None) or self
+    
+    def _prepared_cursor(self, query, dictionary=False):
+        """Vráti pripravený kurzor pre horúci dotaz (jeden na dotaz a pripojenie)"""
+        connection_id = self.connection.connection_id
+        if connection_id != self._prepared_connection_id:
+            # ping(reconnect=True) mohol potichu vytvoriť nové pripojenie,
+            # staré statementy na serveri už neexistujú
+            self._prepared_cursors = {}
+            self._prepared_connection_id = connection_id
+        
+        key = (query, dictionary)
+        cursor = self._prepared_cursors.get(key)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True, dictionary=dictionary)
+            self._prepared_cursors[key] = cursor
+        return cursor
+    
+    def _discard_prepared_cursor(self, query, dictionary=False):
+        """Zahodí pripravený kurzor po chybe, pri ďalšom volaní sa pripraví znova"""
+        cursor = self._prepared_cursors.pop((query, dictionary), None)
+        if cursor is None:
+            return
+        # close() uvoľní statement na serveri (inak ostane do max_prepared_stmt_count)
+        try:
+            cursor.close()
+        except Error:
+            pass
+    
     def hash_password(self, password):
         """Hashovanie hesla pomocou SHA256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -77,6 +245,7 @@ class DatabaseManager:
             print(f"Chyba pri overovanĂ­ pouĹľĂ­vateÄľa: {e}")
             return None
     
+    @coalesced
     def get_clients_by_warehouse(self, warehouse):
         """ZĂ­skanie klientov podÄľa skladu"""
         self.ensure_connection()
@@ -116,8 +285,11 @@ class DatabaseManager:
             """
             cursor.execute(query, (client_name, warehouse, created_by))
             self.connection.commit()
+            client_id = cursor.lastrowid
             cursor.close()
             
+            self.client_search.add(warehouse, client_id, client_name)
+            
             return True
         except Error as e:
             print(f"Chyba pri pridĂˇvanĂ­ klienta: {e}")
@@ -141,6 +313,8 @@ class DatabaseManager:
             self.connection.commit()
             cursor.close()
             
+            self.client_search.remove(warehouse, client_id)
+            
             return True
         except Error as e:
             print(f"Chyba pri odstraĹovanĂ­ klienta: {e}")
@@ -154,18 +328,16 @@ class DatabaseManager:
             return None
         
         try:
-            cursor = self.connection.cursor()
-            query = """
-            INSERT INTO time_records (user_id, client_id, start_time, description)
-            VALUES (%s, %s, NOW(), %s)
-            """
-            cursor.execute(query, (user_id, client_id, description))
+            cursor = self._prepared_cursor(START_TIME_RECORD_QUERY)
+            cursor.execute(START_TIME_RECORD_QUERY, (user_id, client_id, description))
             self.connection.commit()
             record_id = cursor.lastrowid
-            cursor.close()
+            
+            self.recent_usage.record_start(user_id, client_id, record_id)
             
             return record_id
         except Error as e:
+            self._discard_prepared_cursor(START_TIME_RECORD_QUERY)
             print(f"Chyba pri zaÄŤatĂ­ zĂˇznamu ÄŤasu: {e}")
             return None
     
@@ -177,21 +349,15 @@ class DatabaseManager:
             return False
         
         try:
-            cursor = self.connection.cursor()
-            query = """
-            UPDATE time_records 
-            SET end_time = NOW(), 
-                duration_seconds = TIMESTAMPDIFF(SECOND, start_time, NOW()),
-                task_id = %s,
-                custom_task_name = %s
-            WHERE id = %s AND end_time IS NULL
-            """
-            cursor.execute(query, (task_id, custom_task_name, record_id))
+            cursor = self._prepared_cursor(END_TIME_RECORD_QUERY)
+            cursor.execute(END_TIME_RECORD_QUERY, (task_id, custom_task_name, record_id))
             self.connection.commit()
-            cursor.close()
+            
+            self.recent_usage.record_end(record_id, task_id, custom_task_name)
             
             return True
         except Error as e:
+            self._discard_prepared_cursor(END_TIME_RECORD_QUERY)
             print(f"Chyba pri ukonÄŤenĂ­ zĂˇznamu ÄŤasu: {e}")
             return False
     
@@ -211,23 +377,164 @@ class DatabaseManager:
             deleted_count = cursor.rowcount
             cursor.close()
             
+            self.recent_usage.record_cancel(record_id)
+            
             return deleted_count > 0
         except Error as e:
             print(f"Chyba pri zruĹˇenĂ­ zĂˇznamu ÄŤasu: {e}")
             return False
     
-    def get_user_time_records(self, user_id, limit=50):
-        """ZĂ­skanie poslednĂ˝ch zĂˇznamov ÄŤasu pouĹľĂ­vateÄľa"""
+    def apply_timer_events(self, events, id_map):
+        """
+        Prenos udalostí časovača zo write-behind žurnálu v jednej transakcii.
+        id_map (provizórne ID -> skutočné ID) sa dopĺňa o novo vložené záznamy.
+        Opakované prehratie tých istých udalostí nevytvorí duplikáty.
+        Časy udalostí (hodiny API servera) sa prepočítajú na hodiny DB, ktorými
+        zapisuje priamy režim (NOW()), aby trvania a dni reportov sedeli.
+        """
         self.ensure_connection()
         
         if not self.connection:
-            return []
+            return False
+        
+        try:
+            self.connection.start_transaction()
+            cursor = self.connection.cursor()
+            late_starts = []
+            offset, db_now = self._db_clock_offset(cursor)
+            
+            for event in events:
+                record_id = event['record_id']
+                event_time = shift_event_time(event['time'], offset)
+                
+                if event['type'] == 'start':
+                    # Štart už mohol byť prenesený pred pádom (pred zápisom checkpointu).
+                    # Posun hodín sa pri opakovaní môže líšiť o zlomok sekundy - hľadá sa v okne
+                    cursor.execute("""
+                    SELECT id FROM time_records
+                    WHERE user_id = %s AND client_id = %s
+                      AND start_time BETWEEN %s - INTERVAL 2 SECOND AND %s + INTERVAL 2 SECOND
+                    ORDER BY ABS(TIMESTAMPDIFF(SECOND, start_time, %s))
+                    LIMIT 1
+                    """, (event['user_id'], event['client_id'], event_time, event_time, event_time))
+                    existing = cursor.fetchone()
+                    if existing:
+                        id_map[record_id] = existing[0]
+                        continue
+                    
+                    cursor.execute("""
+                    INSERT INTO time_records (user_id, client_id, start_time, description)
+                    VALUES (%s, %s, %s, %s)
+                    """, (event['user_id'], event['client_id'], event_time, event['description']))
+                    id_map[record_id] = cursor.lastrowid
+                    # Štart pred polnocou (podľa DB) prenesený po nej - deň už mohol byť v cache reportov
+                    if event.get('warehouse') and event_time.date() < db_now.date():
+                        late_starts.append((event['warehouse'], event_time))
+                    continue
+                
+                real_id = id_map.get(record_id, record_id)
+                if real_id < 0:
+                    print(f"Žurnál: neznámy provizórny záznam {record_id}, udalosť preskočená")
+                    continue
+                
+                if event['type'] == 'end':
+                    cursor.execute("""
+                    UPDATE time_records 
+                    SET end_time = %s, 
+                        duration_seconds = TIMESTAMPDIFF(SECOND, start_time, %s),
+                        task_id = %s,
+                        custom_task_name = %s
+                    WHERE id = %s AND end_time IS NULL
+                    """, (event_time, event_time, event['task_id'],
+                          event['custom_task_name'], real_id))
+                elif event['type'] == 'cancel':
+                    cursor.execute(
+                        "DELETE FROM time_records WHERE id = %s AND end_time IS NULL",
+                        (real_id,)
+                    )
+            
+            self.connection.commit()
+            cursor.close()
+            
+            for warehouse, start_time in late_starts:
+                self.report_cache.invalidate(warehouse, [start_time])
+            
+            return True
+        except (DataError, IntegrityError):
+            # Chybné dáta udalosti (napr. neexistujúci klient) - opakovanie nepomôže,
+            # žurnál chybnú udalosť nájde a odloží do karantény
+            try:
+                self.connection.rollback()
+            except Error:
+                pass
+            raise
+        except Error as e:
+            print(f"Chyba pri prenose udalostí časovača: {e}")
+            try:
+                self.connection.rollback()
+            except Error:
+                pass
+            return False
+    
+    def _db_clock_offset(self, cursor):
+        """(posun hodín DB voči tomuto serveru, čas DB) - jeden dotaz na dávku žurnálu"""
+        before = datetime.datetime.now()
+        cursor.execute("SELECT NOW(6)")
+        db_now = cursor.fetchone()[0]
+        after = datetime.datetime.now()
+        return db_now - (before + (after - before) / 2), db_now
+    
+    @coalesced
+    def get_open_time_records(self, warehouse):
+        """
+        Všetky otvorené záznamy skladu (end_time IS NULL) jedným dotazom nad indexom
+        (end_time, start_time). Vráti None pri chybe - prázdny zoznam je platný stav.
+        """
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
         
         try:
             cursor = self.connection.cursor(dictionary=True)
             query = """
-            SELECT tr.id, tr.start_time, tr.end_time, tr.duration_seconds,
-                   tr.description, c.client_name
+            SELECT tr.id AS record_id, tr.user_id, u.username, u.full_name,
+                   tr.client_id, c.client_name, tr.start_time,
+                   TIMESTAMPDIFF(SECOND, tr.start_time, NOW()) AS elapsed_seconds
+            FROM time_records tr
+            JOIN users u ON tr.user_id = u.id
+            JOIN clients c ON tr.client_id = c.id
+            WHERE tr.end_time IS NULL AND u.warehouse = %s
+            ORDER BY tr.start_time
+            """
+            cursor.execute(query, (warehouse,))
+            records = cursor.fetchall()
+            cursor.close()
+            
+            return records
+        except Error as e:
+            print(f"Chyba pri získavaní otvorených záznamov skladu: {e}")
+            return None
+    
+    def get_user_time_records(self, user_id, limit=50, row_format='dict'):
+        """ZĂ­skanie poslednĂ˝ch zĂˇznamov ÄŤasu pouĹľĂ­vateÄľa"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return []
+        
+        try:
+            # row_format='tuple' - riadky (id, client_name, start_time, end_time, duration_seconds)
+            # pre priame kódovanie do JSON bez dict-u na riadok
+            if row_format == 'tuple':
+                cursor = self.connection.cursor()
+                columns = "tr.id, c.client_name, tr.start_time, tr.end_time, tr.duration_seconds"
+            else:
+                cursor = self.connection.cursor(dictionary=True)
+                columns = """tr.id, tr.start_time, tr.end_time, tr.duration_seconds,
+                   tr.description, c.client_name"""
+            query = f"""
+            SELECT {columns}
             FROM time_records tr
             JOIN clients c ON tr.client_id = c.id
             WHERE tr.user_id = %s
@@ -243,15 +550,24 @@ class DatabaseManager:
             print(f"Chyba pri zĂ­skavanĂ­ zĂˇznamov ÄŤasu: {e}")
             return []
     
-    def get_warehouse_time_records(self, warehouse, start_date=None, end_date=None):
+    def get_warehouse_time_records(self, warehouse, start_date=None, end_date=None, row_format='dict'):
         """ZĂ­skanie vĹˇetkĂ˝ch zĂˇznamov ÄŤasu pre konkrĂ©tny sklad"""
+        # S počiatočným dátumom sa uzavreté dni berú z cache, živo len dnešok
+        if start_date and self.report_cache.enabled:
+            rows = self._cached_warehouse_rows(warehouse, start_date, end_date)
+            if rows is not None:
+                if row_format == 'dict':
+                    return [dict(zip(REPORT_COLUMNS, row)) for row in rows]
+                return build_report_rows(rows, row_format)
+        
         self.ensure_connection()
         
         if not self.connection:
             return []
         
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            # row_format: 'dict' (predvolené), 'tuple' (TimeRecordRow) alebo 'columns' (ReportColumns)
+            cursor = self.connection.cursor(dictionary=(row_format == 'dict'))
             
             # ZĂˇkladnĂ˝ query s LEFT JOIN pre tasks
             query = """
@@ -288,7 +604,10 @@ class DatabaseManager:
             query += " ORDER BY tr.start_time DESC"
             
             cursor.execute(query, tuple(params))
-            records = cursor.fetchall()
+            if row_format == 'dict':
+                records = cursor.fetchall()
+            else:
+                records = build_report_rows(cursor, row_format)
             cursor.close()
             
             return records
@@ -296,7 +615,95 @@ class DatabaseManager:
             print(f"Chyba pri zĂ­skavanĂ­ zĂˇznamov skladu: {e}")
             return []
     
-    def get_all_time_records(self, start_date=None, end_date=None):
+    def _query_warehouse_rows(self, warehouse, start, end):
+        """Riadky reportu skladu so start_time v [start, end) ako tuple, None pri chybe"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(WAREHOUSE_REPORT_RANGE_QUERY, (warehouse, start, end))
+            rows = cursor.fetchall()
+            cursor.close()
+            
+            return rows
+        except Error as e:
+            print(f"Chyba pri získavaní záznamov skladu: {e}")
+            return None
+    
+    def _db_today(self):
+        """Dnešný dátum podľa DB servera (start_time zapisuje jeho NOW()), None pri chybe"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT CURDATE()")
+            today = cursor.fetchone()[0]
+            cursor.close()
+            
+            return today
+        except Error as e:
+            print(f"Chyba pri získavaní dátumu DB: {e}")
+            return None
+    
+    def _cached_warehouse_rows(self, warehouse, start_date, end_date=None):
+        """
+        Report skladu poskladaný z partícií uzavretých dní v cache a živého dneška.
+        Chýbajúce dni sa načítajú jedným dotazom; do cache ide len deň bez otvorených záznamov.
+        Vráti None ak sa cache nedá použiť (príliš dlhý rozsah, chyba DB).
+        """
+        one_day = datetime.timedelta(days=1)
+        today = self._db_today()
+        if today is None:
+            return None
+        first = to_date(start_date)
+        last = to_date(end_date) if end_date else today
+        
+        if last < first:
+            return []
+        
+        days = day_range(first, min(last, today - one_day))
+        if len(days) > REPORT_CACHE_MAX_DAYS:
+            return None
+        
+        # Generácia pred dotazom - mazanie počas načítania zabráni uloženiu starých riadkov
+        generation = self.report_cache.generation(warehouse)
+        partitions = {day: self.report_cache.get(warehouse, day) for day in days}
+        missing = [day for day in days if partitions[day] is None]
+        
+        if missing:
+            rows = self._query_warehouse_rows(warehouse, missing[0], missing[-1] + one_day)
+            if rows is None:
+                return None
+            
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row[7].date(), []).append(row)
+            
+            for day in missing:
+                partitions[day] = by_day.get(day, [])
+                # end_time IS NULL - deň sa ešte zmení (stop, sweeper)
+                if all(row[8] is not None for row in partitions[day]):
+                    self.report_cache.put(warehouse, day, partitions[day], generation)
+        
+        records = []
+        if last >= today:
+            records = self._query_warehouse_rows(warehouse, max(first, today), last + one_day)
+            if records is None:
+                return None
+        
+        # Poradie ako v SQL - start_time DESC
+        for day in reversed(days):
+            records.extend(partitions[day])
+        
+        return records
+    
+    def get_all_time_records(self, start_date=None, end_date=None, row_format='dict'):
         """ZĂ­skanie vĹˇetkĂ˝ch zĂˇznamov ÄŤasu zo vĹˇetkĂ˝ch skladov"""
         self.ensure_connection()
         
@@ -304,7 +711,8 @@ class DatabaseManager:
             return []
         
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            # row_format: 'dict' (predvolené), 'tuple' (TimeRecordRow) alebo 'columns' (ReportColumns)
+            cursor = self.connection.cursor(dictionary=(row_format == 'dict'))
             
             query = """
             SELECT 
@@ -339,7 +747,10 @@ class DatabaseManager:
             query += " ORDER BY tr.start_time DESC"
             
             cursor.execute(query, tuple(params))
-            records = cursor.fetchall()
+            if row_format == 'dict':
+                records = cursor.fetchall()
+            else:
+                records = build_report_rows(cursor, row_format)
             cursor.close()
             
             return records
@@ -347,6 +758,75 @@ class DatabaseManager:
             print(f"Chyba pri zĂ­skavanĂ­ vĹˇetkĂ˝ch zĂˇznamov: {e}")
             return []
     
+    def get_stale_time_records(self, min_open_seconds, after_id=0, limit=100, warehouse=None):
+        """
+        Otvorené záznamy (end_time IS NULL) staršie ako min_open_seconds, po dávkach podľa id.
+        Využíva index (end_time, start_time) na time_records.
+        """
+        self.ensure_connection()
+        
+        if not self.connection:
+            return []
+        
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            query = """
+            SELECT tr.id, u.warehouse, tr.user_id, tr.start_time,
+                   TIMESTAMPDIFF(SECOND, tr.start_time, NOW()) as open_seconds
+            FROM time_records tr
+            JOIN users u ON tr.user_id = u.id
+            WHERE tr.end_time IS NULL
+              AND tr.start_time < NOW() - INTERVAL %s SECOND
+              AND tr.id > %s
+            """
+            params = [min_open_seconds, after_id]
+            
+            if warehouse:
+                query += " AND u.warehouse = %s"
+                params.append(warehouse)
+            
+            query += " ORDER BY tr.id LIMIT %s"
+            params.append(limit)
+            
+            cursor.execute(query, tuple(params))
+            records = cursor.fetchall()
+            cursor.close()
+            
+            return records
+        except Error as e:
+            print(f"Chyba pri hľadaní zabudnutých časovačov: {e}")
+            return []
+    
+    def close_stale_time_records(self, record_ids, limit_seconds, task_name):
+        """Ukončenie zabudnutých záznamov k start_time + limit, vráti počet ukončených"""
+        self.ensure_connection()
+        
+        if not self.connection or not record_ids:
+            return 0
+        
+        try:
+            cursor = self.connection.cursor()
+            placeholders = ', '.join(['%s'] * len(record_ids))
+            
+            query = f"""
+            UPDATE time_records 
+            SET end_time = DATE_ADD(start_time, INTERVAL %s SECOND),
+                duration_seconds = %s,
+                custom_task_name = COALESCE(custom_task_name, %s)
+            WHERE id IN ({placeholders}) AND end_time IS NULL
+            """
+            params = [limit_seconds, limit_seconds, task_name] + list(record_ids)
+            
+            cursor.execute(query, params)
+            self.connection.commit()
+            affected = cursor.rowcount
+            cursor.close()
+            
+            return affected
+        except Error as e:
+            print(f"Chyba pri ukončovaní zabudnutých časovačov: {e}")
+            return 0
+    
     def delete_time_record(self, record_id, warehouse):
         """Vymazanie jednĂ©ho ÄŤasovĂ©ho zĂˇznamu (len pre zĂˇznamy z danĂ©ho skladu)"""
         self.ensure_connection()
@@ -356,6 +836,14 @@ class DatabaseManager:
         
         try:
             cursor = self.connection.cursor()
+            # Deň záznamu pre invalidáciu cache reportov
+            cursor.execute("""
+            SELECT DATE(tr.start_time) FROM time_records tr
+            JOIN users u ON tr.user_id = u.id
+            WHERE tr.id = %s AND u.warehouse = %s
+            """, (record_id, warehouse))
+            days = [row[0] for row in cursor.fetchall()]
+            
             query = """
             DELETE tr FROM time_records tr
             JOIN users u ON tr.user_id = u.id
@@ -366,47 +854,190 @@ class DatabaseManager:
             affected = cursor.rowcount
             cursor.close()
             
+            self.report_cache.invalidate(warehouse, days)
+            
             return affected > 0
         except Error as e:
             print(f"Chyba pri mazanĂ­ zĂˇznamu: {e}")
             return False
     
     def delete_multiple_time_records(self, record_ids, warehouse):
-        """Vymazanie viacerĂ˝ch ÄŤasovĂ˝ch zĂˇznamov naraz"""
-        self.ensure_connection()
-        
-        if not self.connection or not record_ids:
+        """
+        Vymazanie viacerých časových záznamov (po dávkach, vráti počet zmazaných).
+        Dávky sa potvrdzujú samostatne - ak niektorá zlyhá, vráti počet zmazaných
+        v predošlých dávkach; False len ak sa nezmazalo nič.
+        """
+        if not record_ids:
             return False
         
-        try:
-            cursor = self.connection.cursor()
+        result = self.delete_time_records_chunked(record_ids, warehouse)
+        
+        if result['error']:
+            if not result['deleted']:
+                return False
+            print(f"Mazanie záznamov prerušené po {result['deleted']} zmazaných "
+                  f"z {result['requested']}: {result['error']}")
+        
+        return result['deleted']
+    
+    def delete_time_records_chunked(self, record_ids, warehouse, chunk_size=None, pause=None, progress=None):
+        """
+        Vymazanie záznamov podľa ID po dávkach - každá dávka vo vlastnej krátkej transakcii,
+        medzi dávkami pauza aby neblokovali zápisy časovačov.
+        progress(deleted, processed, total) sa volá po každej dávke.
+        Vráti {'requested', 'deleted', 'chunks', 'error'}.
+        """
+        chunk_size = chunk_size or BULK_DELETE_CHUNK_SIZE
+        pause = BULK_DELETE_PAUSE if pause is None else pause
+        record_ids = list(dict.fromkeys(record_ids))
+        
+        result = {'requested': len(record_ids), 'deleted': 0, 'chunks': 0, 'error': None}
+        
+        if not 0 < chunk_size <= BULK_DELETE_MAX_CHUNK_SIZE:
+            result['error'] = f'Neplatná veľkosť dávky: {chunk_size}'
+            return result
+        
+        for offset in range(0, len(record_ids), chunk_size):
+            chunk = record_ids[offset:offset + chunk_size]
             
-            # Vytvorenie placeholder-ov pre SQL query
-            placeholders = ', '.join(['%s'] * len(record_ids))
+            if offset and pause:
+                time.sleep(pause)
             
-            query = f"""
-            DELETE tr FROM time_records tr
-            JOIN users u ON tr.user_id = u.id
-            WHERE tr.id IN ({placeholders}) AND u.warehouse = %s
-            """
+            self.ensure_connection()
             
-            # Pridanie warehouse na koniec parametrov
-            params = list(record_ids) + [warehouse]
+            if not self.connection:
+                result['error'] = 'Databáza nie je dostupná'
+                break
             
-            cursor.execute(query, params)
-            self.connection.commit()
-            affected = cursor.rowcount
-            cursor.close()
+            try:
+                cursor = self.connection.cursor()
+                placeholders = ', '.join(['%s'] * len(chunk))
+                
+                # Dni dávky pre invalidáciu cache reportov
+                cursor.execute(f"""
+                SELECT DISTINCT DATE(tr.start_time) FROM time_records tr
+                JOIN users u ON tr.user_id = u.id
+                WHERE tr.id IN ({placeholders}) AND u.warehouse = %s
+                """, chunk + [warehouse])
+                days = [row[0] for row in cursor.fetchall()]
+                
+                query = f"""
+                DELETE tr FROM time_records tr
+                JOIN users u ON tr.user_id = u.id
+                WHERE tr.id IN ({placeholders}) AND u.warehouse = %s
+                """
+                cursor.execute(query, chunk + [warehouse])
+                self.connection.commit()
+                affected = cursor.rowcount
+                cursor.close()
+                
+                self.report_cache.invalidate(warehouse, days)
+            except Error as e:
+                print(f"Chyba pri mazaní viacerých záznamov: {e}")
+                result['error'] = str(e)
+                break
             
-            return affected
-        except Error as e:
-            print(f"Chyba pri mazanĂ­ viacerĂ˝ch zĂˇznamov: {e}")
-            return False
+            result['deleted'] += affected
+            result['chunks'] += 1
+            
+            if progress:
+                progress(result['deleted'], offset + len(chunk), len(record_ids))
+        
+        return result
+    
+    def delete_time_records_by_filter(self, warehouse, start_date=None, end_date=None, user_id=None,
+                                      client_id=None, chunk_size=None, pause=None, progress=None):
+        """
+        Vymazanie záznamov skladu podľa filtra (dátumy, používateľ, klient) po dávkach.
+        ID sa vyberajú po dávkach podľa primárneho kľúča a mažú jednoduchým DELETE podľa id.
+        progress(deleted, processed, None) sa volá po každej dávke.
+        Vráti {'requested', 'deleted', 'chunks', 'error'}.
+        """
+        chunk_size = chunk_size or BULK_DELETE_CHUNK_SIZE
+        pause = BULK_DELETE_PAUSE if pause is None else pause
+        
+        if not 0 < chunk_size <= BULK_DELETE_MAX_CHUNK_SIZE:
+            return {'requested': 0, 'deleted': 0, 'chunks': 0, 'error': f'Neplatná veľkosť dávky: {chunk_size}'}
+        
+        select_query = """
+        SELECT tr.id, DATE(tr.start_time)
+        FROM time_records tr
+        JOIN users u ON tr.user_id = u.id
+        WHERE u.warehouse = %s AND tr.id > %s
+        """
+        filter_params = []
+        
+        if start_date:
+            select_query += " AND tr.start_time >= %s"
+            filter_params.append(start_date)
+        
+        if end_date:
+            select_query += " AND tr.start_time < %s + INTERVAL 1 DAY"
+            filter_params.append(end_date)
+        
+        if user_id:
+            select_query += " AND tr.user_id = %s"
+            filter_params.append(user_id)
+        
+        if client_id:
+            select_query += " AND tr.client_id = %s"
+            filter_params.append(client_id)
+        
+        select_query += " ORDER BY tr.id LIMIT %s"
+        
+        result = {'requested': 0, 'deleted': 0, 'chunks': 0, 'error': None}
+        last_id = 0
+        
+        while True:
+            if result['chunks'] and pause:
+                time.sleep(pause)
+            
+            self.ensure_connection()
+            
+            if not self.connection:
+                result['error'] = 'Databáza nie je dostupná'
+                break
+            
+            try:
+                cursor = self.connection.cursor()
+                cursor.execute(select_query, tuple([warehouse, last_id] + filter_params + [chunk_size]))
+                rows = cursor.fetchall()
+                chunk = [row[0] for row in rows]
+                
+                if not chunk:
+                    cursor.close()
+                    break
+                
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM time_records WHERE id IN ({placeholders})", chunk)
+                self.connection.commit()
+                affected = cursor.rowcount
+                cursor.close()
+                
+                self.report_cache.invalidate(warehouse, [row[1] for row in rows])
+            except Error as e:
+                print(f"Chyba pri mazaní záznamov podľa filtra: {e}")
+                result['error'] = str(e)
+                break
+            
+            last_id = chunk[-1]
+            result['requested'] += len(chunk)
+            result['deleted'] += affected
+            result['chunks'] += 1
+            
+            if progress:
+                progress(result['deleted'], result['requested'], None)
+            
+            if len(chunk) < chunk_size:
+                break
+        
+        return result
     
     # ============================================
     # API METĂ“DY PRE WEAR OS
     # ============================================
     
+    @coalesced
     def verify_user(self, username, password_hash):
         """Overenie pouĹľĂ­vateÄľa pre API (uĹľ hashovanĂ© heslo)"""
         self.ensure_connection()
@@ -430,30 +1061,35 @@ class DatabaseManager:
             print(f"Chyba pri overovanĂ­ pouĹľĂ­vateÄľa: {e}")
             return None
     
+    @coalesced
     def get_clients(self, warehouse):
         """ZĂ­skanie klientov pre API (tuple formĂˇt)"""
+        clients = self.load_clients(warehouse)
+        return clients if clients is not None else []
+    
+    @coalesced
+    def load_clients(self, warehouse):
+        """
+        Klienti skladu (tuple formát) pre in-memory index. Vráti None pri chybe -
+        prázdny zoznam je platný stav a index ho môže cacheovať.
+        """
         self.ensure_connection()
         
         if not self.connection:
-            return []
+            return None
         
         try:
-            cursor = self.connection.cursor()
-            query = """
-            SELECT id, client_name, warehouse
-            FROM clients 
-            WHERE warehouse = %s AND is_active = TRUE
-            ORDER BY client_name
-            """
-            cursor.execute(query, (warehouse,))
+            cursor = self._prepared_cursor(GET_CLIENTS_QUERY)
+            cursor.execute(GET_CLIENTS_QUERY, (warehouse,))
             clients = cursor.fetchall()
-            cursor.close()
             
             return clients
         except Error as e:
+            self._discard_prepared_cursor(GET_CLIENTS_QUERY)
             print(f"Chyba pri zĂ­skavanĂ­ klientov: {e}")
-            return []
+            return None
     
+    @coalesced
     def get_user_by_username(self, username):
         """ZĂ­skanie pouĹľĂ­vateÄľa podÄľa username (tuple formĂˇt)"""
         self.ensure_connection()
@@ -477,6 +1113,51 @@ class DatabaseManager:
             print(f"Chyba pri zĂ­skavanĂ­ pouĹľĂ­vateÄľa: {e}")
             return None
     
+    def get_bootstrap(self, username, warehouse):
+        """
+        Používateľ, klienti, úkony a aktívny záznam jedným multi-statement dotazom
+        (jedno overenie pripojenia, jeden round trip). Vráti dict alebo None pri chybe.
+        """
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            cursor = self.connection.cursor()
+            results = []
+            for result in cursor.execute(BOOTSTRAP_QUERY, (username, warehouse, warehouse, username), multi=True):
+                if result.with_rows:
+                    results.append(result.fetchall())
+            cursor.close()
+            
+            users, clients, tasks, active = results
+            
+            active_record = None
+            if active:
+                record_id, client_name, start_time, elapsed_seconds = active[0]
+                active_record = {
+                    'record_id': record_id,
+                    'client_name': client_name,
+                    'start_time': start_time,
+                    'elapsed_seconds': elapsed_seconds
+                }
+            
+            # Verzia katalógu - hash obsahu, hodinky podľa nej vedia, či treba zoznamy prekresliť
+            catalog = json.dumps([clients, tasks], ensure_ascii=False, default=str)
+            catalog_version = hashlib.sha1(catalog.encode()).hexdigest()[:16]
+            
+            return {
+                'user_id': users[0][0] if users else None,
+                'clients': clients,
+                'tasks': tasks,
+                'active_record': active_record,
+                'catalog_version': catalog_version
+            }
+        except Error as e:
+            print(f"Chyba pri načítaní dát pre štart hodiniek: {e}")
+            return None
+    
     def get_active_time_record(self, user_id):
         """ZĂ­skanie aktĂ­vneho ÄŤasovĂ©ho zĂˇznamu pre pouĹľĂ­vateÄľa"""
         self.ensure_connection()
@@ -484,28 +1165,43 @@ class DatabaseManager:
         if not self.connection:
             return None
         
+        try:
+            cursor = self._prepared_cursor(GET_ACTIVE_TIME_RECORD_QUERY, dictionary=True)
+            cursor.execute(GET_ACTIVE_TIME_RECORD_QUERY, (user_id,))
+            # fetchall aby na pripravenom kurzore neostal neprečítaný výsledok
+            rows = cursor.fetchall()
+            record = rows[0] if rows else None
+            
+            return record
+        except Error as e:
+            self._discard_prepared_cursor(GET_ACTIVE_TIME_RECORD_QUERY, dictionary=True)
+            print(f"Chyba pri zĂ­skavanĂ­ aktĂ­vneho zĂˇznamu: {e}")
+            return None
+    
+    def get_recent_usage_history(self, user_id, limit=200):
+        """Posledné záznamy používateľa pre jednorazové naplnenie MRU/MFU zoznamov"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return []
+        
         try:
             cursor = self.connection.cursor(dictionary=True)
             query = """
-            SELECT 
-                tr.id as record_id,
-                c.client_name,
-                tr.start_time,
-                TIMESTAMPDIFF(SECOND, tr.start_time, NOW()) as elapsed_seconds
-            FROM time_records tr
-            JOIN clients c ON tr.client_id = c.id
-            WHERE tr.user_id = %s AND tr.end_time IS NULL
-            ORDER BY tr.start_time DESC
-            LIMIT 1
+            SELECT client_id, task_id, custom_task_name, start_time
+            FROM time_records
+            WHERE user_id = %s
+            ORDER BY start_time DESC
+            LIMIT %s
             """
-            cursor.execute(query, (user_id,))
-            record = cursor.fetchone()
+            cursor.execute(query, (user_id, limit))
+            records = cursor.fetchall()
             cursor.close()
             
-            return record
+            return records
         except Error as e:
-            print(f"Chyba pri zĂ­skavanĂ­ aktĂ­vneho zĂˇznamu: {e}")
-            return None
+            print(f"Chyba pri získavaní histórie používania: {e}")
+            return []
     
     # ============================================
     # SPRĂVA POUĹ˝ĂŤVATEÄ˝OV (ADMIN)
@@ -671,15 +1367,179 @@ class DatabaseManager:
             affected = cursor.rowcount
             cursor.close()
             
+            # Záznamy používateľa (ak ich cudzí kľúč zmaže s ním) môžu byť v ktoromkoľvek dni skladu
+            if affected:
+                self.report_cache.invalidate_warehouse(warehouse)
+            
             return affected > 0
         except Error as e:
             print(f"Chyba pri mazanĂ­ pouĹľĂ­vateÄľa: {e}")
             return False
     
+    # ============================================
+    # HROMADNÝ IMPORT (ADMIN)
+    # ============================================
+    
+    def _existing_values(self, query_prefix, values, params_prefix=()):
+        """Množina hodnôt, ktoré už v DB existujú - jeden set-based dotaz na dávku"""
+        existing = set()
+        values = list(values)
+        
+        cursor = self.connection.cursor()
+        for offset in range(0, len(values), IMPORT_BATCH_SIZE):
+            chunk = values[offset:offset + IMPORT_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"{query_prefix} ({placeholders})", tuple(params_prefix) + tuple(chunk))
+            existing.update(row[0].casefold() for row in cursor.fetchall())
+        cursor.close()
+        
+        return existing
+    
+    def _bulk_insert(self, query, rows):
+        """
+        Vloženie riadkov cez executemany v dávkových transakciách.
+        rows je zoznam (číslo_riadku, params). Ak dávka zlyhá, vloží sa po riadkoch,
+        aby sa chyba dala priradiť konkrétnemu riadku. Vráti (počet_vložených, chyby).
+        """
+        inserted = 0
+        errors = []
+        
+        for offset in range(0, len(rows), IMPORT_BATCH_SIZE):
+            batch = rows[offset:offset + IMPORT_BATCH_SIZE]
+            cursor = self.connection.cursor()
+            try:
+                self.connection.start_transaction()
+                cursor.executemany(query, [params for _, params in batch])
+                self.connection.commit()
+                inserted += len(batch)
+                continue
+            except Error as e:
+                self.connection.rollback()
+                print(f"Chyba pri dávkovom importe, skúšam po riadkoch: {e}")
+            finally:
+                cursor.close()
+            
+            cursor = self.connection.cursor()
+            for row_number, params in batch:
+                try:
+                    cursor.execute(query, params)
+                    self.connection.commit()
+                    inserted += 1
+                except Error as e:
+                    errors.append({'row': row_number, 'error': str(e)})
+            cursor.close()
+        
+        return inserted, errors
+    
+    def bulk_add_users(self, rows, warehouse):
+        """
+        Hromadné pridanie používateľov, rows = [(číslo_riadku, {username, password, full_name, role})].
+        Vráti {'inserted', 'errors'} alebo None ak DB nie je dostupná.
+        """
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            existing = self._existing_values(
+                "SELECT username FROM users WHERE username IN",
+                [row['username'] for _, row in rows]
+            )
+            
+            errors = []
+            to_insert = []
+            for row_number, row in rows:
+                if row['username'].casefold() in existing:
+                    errors.append({'row': row_number, 'error': f"Username {row['username']} už existuje"})
+                    continue
+                to_insert.append((row_number, (
+                    row['username'], self.hash_password(row['password']),
+                    row['full_name'], warehouse, row['role']
+                )))
+            
+            inserted, insert_errors = self._bulk_insert("""
+            INSERT INTO users (username, password_hash, full_name, warehouse, role)
+            VALUES (%s, %s, %s, %s, %s)
+            """, to_insert)
+            
+            return {'inserted': inserted, 'errors': errors + insert_errors}
+        except Error as e:
+            print(f"Chyba pri hromadnom pridávaní používateľov: {e}")
+            return None
+    
+    def bulk_add_clients(self, rows, warehouse, created_by):
+        """Hromadné pridanie klientov, rows = [(číslo_riadku, {client_name})]"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            existing = self._existing_values(
+                "SELECT client_name FROM clients WHERE warehouse = %s AND is_active = TRUE AND client_name IN",
+                [row['client_name'] for _, row in rows],
+                (warehouse,)
+            )
+            
+            errors = []
+            to_insert = []
+            for row_number, row in rows:
+                if row['client_name'].casefold() in existing:
+                    errors.append({'row': row_number, 'error': f"Klient {row['client_name']} už existuje"})
+                    continue
+                to_insert.append((row_number, (row['client_name'], warehouse, created_by)))
+            
+            inserted, insert_errors = self._bulk_insert("""
+            INSERT INTO clients (client_name, warehouse, created_by)
+            VALUES (%s, %s, %s)
+            """, to_insert)
+            
+            # ID nových klientov executemany nevracia - index skladu sa načíta znova
+            self.client_search.invalidate(warehouse)
+            
+            return {'inserted': inserted, 'errors': errors + insert_errors}
+        except Error as e:
+            print(f"Chyba pri hromadnom pridávaní klientov: {e}")
+            return None
+    
+    def bulk_add_tasks(self, rows, warehouse, created_by):
+        """Hromadné pridanie úkonov, rows = [(číslo_riadku, {task_name})]"""
+        self.ensure_connection()
+        
+        if not self.connection:
+            return None
+        
+        try:
+            existing = self._existing_values(
+                "SELECT task_name FROM tasks WHERE warehouse = %s AND is_active = 1 AND task_name IN",
+                [row['task_name'] for _, row in rows],
+                (warehouse,)
+            )
+            
+            errors = []
+            to_insert = []
+            for row_number, row in rows:
+                if row['task_name'].casefold() in existing:
+                    errors.append({'row': row_number, 'error': f"Úkon {row['task_name']} už existuje"})
+                    continue
+                to_insert.append((row_number, (row['task_name'], warehouse, created_by)))
+            
+            inserted, insert_errors = self._bulk_insert("""
+            INSERT INTO tasks (task_name, warehouse, created_by, is_predefined)
+            VALUES (%s, %s, %s, 0)
+            """, to_insert)
+            
+            return {'inserted': inserted, 'errors': errors + insert_errors}
+        except Error as e:
+            print(f"Chyba pri hromadnom pridávaní úkonov: {e}")
+            return None
+    
     # ============================================
     # SPRĂVA ĂšKONOV (TASKS)
     # ============================================
     
+    @coalesced
     def get_tasks_by_warehouse(self, warehouse):
         """ZĂ­skanie Ăşkonov pre danĂ˝ sklad"""
         self.ensure_connection()
@@ -704,6 +1564,7 @@ class DatabaseManager:
             print(f"Chyba pri zĂ­skavanĂ­ Ăşkonov: {e}")
             return []
     
+    @coalesced
     def get_tasks(self, warehouse):
         """ZĂ­skanie Ăşkonov pre API (tuple formĂˇt)"""
         self.ensure_connection()
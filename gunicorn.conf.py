@@ -0,0 +1,17 @@
+"""
+Konfigurácia gunicorn (načíta sa automaticky z pracovného adresára)
+Záložný sync režim; Procfile spúšťa ASGI server (asgi_server.py), v ktorom platí admission control.
+Spustenie: gunicorn api_server:app --bind 0.0.0.0:$PORT
+"""
+
+# Jeden proces (žurnál časovačov patrí jednému procesu) s jedným vláknom - DatabaseManager
+# má jedno pripojenie na shard a nie je bezpečný pre viac vlákien. Requesty sa teda
+# vybavujú po jednom a admission control tu nič neobmedzuje; súbežnosť dáva ASGI režim (Procfile).
+workers = 1
+threads = 1
+
+
+def post_worker_init(worker):
+    """Úlohy na pozadí (sweeper zabudnutých časovačov) až v bežiacom workeri"""
+    from api_server import start_background_workers
+    start_background_workers()
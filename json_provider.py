@@ -0,0 +1,81 @@
+"""
+Rýchly JSON provider pre Flask aplikáciu
+S orjson (ak je nainštalovaný) sa odpovede kódujú priamo do bajtov, datetime
+natívne ako ISO 8601 a Decimal ako reťazec. Bez orjson sa použije štandardný
+json s rovnakým výstupom pre datetime/Decimal, takže riadky z DB môžu ísť
+do odpovede bez .isoformat() na každú hodnotu.
+
+JSON_PROVIDER=auto (predvolené) | orjson | default
+"""
+
+import datetime
+import decimal
+import os
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # voliteľná závislosť - bez nej štandardný json
+    orjson = None
+
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+
+def _default(value):
+    """Typy, ktoré json/orjson nevedia zakódovať samé"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Štandardný json, ale datetime ako ISO 8601 (Flask predvolene posiela HTTP dátum)"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson - kompaktný výstup priamo v bajtoch, datetime natívne"""
+
+    def _option(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumpb(self, obj):
+        return orjson.dumps(obj, default=_default, option=self._option())
+
+    def dumps(self, obj, **kwargs):
+        # kwargs (indent, separators...) sa ignorujú - výstup je vždy kompaktný
+        return self.dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj), mimetype=self.mimetype)
+
+
+def json_provider_class(name=JSON_PROVIDER):
+    """Trieda providera podľa JSON_PROVIDER"""
+    if name == 'default':
+        return IsoJSONProvider
+    if name == 'orjson' and orjson is None:
+        print("JSON_PROVIDER=orjson, ale orjson nie je nainštalovaný - používam štandardný json")
+    if orjson is not None and name in ('auto', 'orjson'):
+        return OrjsonProvider
+    return IsoJSONProvider
+
+
+def install_json_provider(app, name=JSON_PROVIDER):
+    app.json_provider_class = json_provider_class(name)
+    app.json = app.json_provider_class(app)
+    return app.json
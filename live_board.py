@@ -0,0 +1,98 @@
+"""
+Živá tabuľa skladu - kto práve čo meria (/api/warehouse/live)
+Otvorené časovače skladu sa načítajú jedným dotazom nad indexom (end_time, start_time)
+a krátko (LIVE_BOARD_TTL) sa zdieľajú medzi všetkými supervízormi skladu.
+Uplynulý čas počíta DB (voči svojmu NOW(), ktorým zapisuje start_time) a pri každej
+odpovedi sa k nemu pripočíta vek cache, takže je presný aj z cache.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+# Ako dlho sa zdieľa načítaný stav skladu (sekundy)
+LIVE_BOARD_TTL = float(os.environ.get('LIVE_BOARD_TTL', 3))
+# Ako dlho sa drží zoznam používateľov skladu (mená pre neprenesené štarty žurnálu)
+LIVE_BOARD_USERS_TTL = float(os.environ.get('LIVE_BOARD_USERS_TTL', 60))
+
+
+class LiveBoard:
+    """Krátkodobá cache otvorených časovačov podľa skladu"""
+
+    def __init__(self, loader, users_loader=None, ttl=LIVE_BOARD_TTL, users_ttl=LIVE_BOARD_USERS_TTL):
+        # loader(warehouse) vráti otvorené záznamy skladu (dict s record_id, start_time,
+        # elapsed_seconds podľa DB, ...) alebo None pri chybe DB
+        self._loader = loader
+        # users_loader(warehouse) vráti používateľov skladu (dict s id, username, full_name)
+        self._users_loader = users_loader
+        self.ttl = ttl
+        self.users_ttl = users_ttl
+        self._boards = {}  # sklad -> (čas načítania, záznamy)
+        self._users = {}  # sklad -> (čas načítania, {id: používateľ})
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.user_loads = 0
+
+    def get(self, warehouse):
+        """
+        (otvorené záznamy skladu, vek v sekundách) - zoznam je zdieľaný, nemeniť.
+        Pri chybe (None, 0). elapsed_seconds záznamu platí v čase načítania, teda + vek.
+        """
+        with self._lock:
+            cached = self._boards.get(warehouse)
+            if cached:
+                age = time.monotonic() - cached[0]
+                if age < self.ttl:
+                    self.hits += 1
+                    return cached[1], age
+
+        # Súbežné načítania toho istého skladu zlúči @coalesced loader
+        records = self._loader(warehouse)
+        if records is None:
+            return None, 0
+
+        with self._lock:
+            self.loads += 1
+            self._boards[warehouse] = (time.monotonic(), records)
+        return records, 0
+
+    def users(self, warehouse):
+        """Používatelia skladu podľa ID (zdieľaný dict, nemeniť), z cache na users_ttl"""
+        with self._lock:
+            cached = self._users.get(warehouse)
+            if cached and time.monotonic() - cached[0] < self.users_ttl:
+                return cached[1]
+
+        users = {user['id']: user for user in self._users_loader(warehouse)}
+        # Prázdny zoznam môže byť aj chyba DB - neukladá sa
+        if users:
+            with self._lock:
+                self.user_loads += 1
+                self._users[warehouse] = (time.monotonic(), users)
+        return users
+
+    def invalidate(self, warehouse=None):
+        with self._lock:
+            if warehouse is None:
+                self._boards.clear()
+                self._users.clear()
+            else:
+                self._boards.pop(warehouse, None)
+                self._users.pop(warehouse, None)
+
+    def metrics(self):
+        return {
+            'ttl': self.ttl,
+            'loads': self.loads,
+            'hits': self.hits,
+            'users_ttl': self.users_ttl,
+            'user_loads': self.user_loads
+        }
+
+
+def elapsed_seconds(start_time, now=None):
+    # Len pre časy z hodín API servera (udalosti žurnálu), záznamy z DB majú elapsed_seconds z DB
+    now = now or datetime.datetime.now()
+    return max(0, int((now - start_time).total_seconds()))
@@ -0,0 +1,156 @@
+"""
+Ochrana /api/login pred búrkami neúspešných prihlásení
+Negatívna cache neúspešných kombinácií (username + hash údajov) a token-bucket
+throttling podľa username a IP - opakované zlé prihlásenia sa vybavia z pamäte.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+LOGIN_NEGATIVE_TTL = float(os.environ.get('LOGIN_NEGATIVE_TTL', 60))
+LOGIN_NEGATIVE_SIZE = int(os.environ.get('LOGIN_NEGATIVE_SIZE', 10000))
+# Token bucket: počet neúspešných pokusov naraz a doplnenie (pokusov za sekundu)
+LOGIN_BUCKET_CAPACITY = float(os.environ.get('LOGIN_BUCKET_CAPACITY', 5))
+LOGIN_BUCKET_REFILL = float(os.environ.get('LOGIN_BUCKET_REFILL', 0.1))
+# Za jednou IP (NAT skladu) môže byť veľa hodiniek - voľnejší limit
+LOGIN_IP_BUCKET_CAPACITY = float(os.environ.get('LOGIN_IP_BUCKET_CAPACITY', 50))
+LOGIN_IP_BUCKET_REFILL = float(os.environ.get('LOGIN_IP_BUCKET_REFILL', 1))
+LOGIN_BUCKET_SIZE = 10000
+
+
+class NegativeCache:
+    """Ohraničená LRU cache neúspešných prihlásení s TTL"""
+
+    def __init__(self, ttl=LOGIN_NEGATIVE_TTL, size=LOGIN_NEGATIVE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()  # (username, hash údajov) -> expirácia
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    @staticmethod
+    def key(username, password_hash):
+        # Heslo sa neukladá ani ako samotný hash - len hash z kombinácie údajov
+        digest = hashlib.sha256(f"{username}\0{password_hash}".encode()).hexdigest()
+        return username, digest
+
+    def contains(self, username, password_hash):
+        key = self.key(username, password_hash)
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, username, password_hash):
+        key = self.key(username, password_hash)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, usernames):
+        """Nový používateľ/zmena hesla - zahodiť negatívne záznamy daných username"""
+        usernames = set(usernames)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in usernames]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenBuckets:
+    """Token bucket na kľúč, ohraničený počet sledovaných kľúčov"""
+
+    def __init__(self, capacity=LOGIN_BUCKET_CAPACITY, refill=LOGIN_BUCKET_REFILL,
+                 size=LOGIN_BUCKET_SIZE):
+        self.capacity = capacity
+        self.refill = refill
+        self.size = size
+        self._buckets = OrderedDict()  # kľúč -> [tokeny, čas poslednej aktualizácie]
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def retry_after(self, key):
+        """0 ak kľúč má token, inak počet sekúnd do ďalšieho tokenu"""
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._get(key, now)[0]
+            if tokens >= 1:
+                return 0
+            return max(1, int((1 - tokens) / self.refill) + 1)
+
+    def consume(self, key):
+        """Odobratie tokenu za neúspešný pokus"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._get(key, now)
+            bucket[0] = max(0.0, bucket[0] - 1)
+
+
+class LoginGuard:
+    """Negatívna cache + throttling podľa username a IP"""
+
+    def __init__(self):
+        self.negative = NegativeCache()
+        self.user_buckets = TokenBuckets()
+        self.ip_buckets = TokenBuckets(LOGIN_IP_BUCKET_CAPACITY, LOGIN_IP_BUCKET_REFILL)
+        self.throttled = 0
+        self.db_checks = 0
+
+    def check(self, username, password_hash, ip):
+        """
+        Rozhodnutie pred dotazom do DB:
+        ('throttled', retry_after) / ('rejected', None) / ('check', None)
+        """
+        retry_after = max(
+            self.user_buckets.retry_after(username),
+            self.ip_buckets.retry_after(ip)
+        )
+        if retry_after:
+            self.throttled += 1
+            return 'throttled', retry_after
+
+        if self.negative.contains(username, password_hash):
+            self.user_buckets.consume(username)
+            self.ip_buckets.consume(ip)
+            return 'rejected', None
+
+        self.db_checks += 1
+        return 'check', None
+
+    def failed(self, username, password_hash, ip):
+        """Neúspešné overenie v DB"""
+        self.negative.add(username, password_hash)
+        self.user_buckets.consume(username)
+        self.ip_buckets.consume(ip)
+
+    def metrics(self):
+        return {
+            'negative_cache_size': len(self.negative),
+            'negative_cache_hits': self.negative.hits,
+            'throttled': self.throttled,
+            'db_checks': self.db_checks
+        }
@@ -0,0 +1,128 @@
+"""
+Naposledy a najčastejšie používaní klienti a úkony pre každého používateľa
+Udržiavané inkrementálne pri štarte/stope časovača (pre quick-start na hodinkách)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Koľko klientov/úkonov si pamätáme na používateľa
+RECENT_USAGE_SIZE = int(os.environ.get('RECENT_USAGE_SIZE', 20))
+
+# Max. počet otvorených záznamov, pri ktorých čakáme na stop (record_id -> user_id)
+MAX_PENDING_RECORDS = 10000
+
+
+class _UsageList:
+    """Ohraničený zoznam položiek s časom posledného použitia a počtom použití"""
+
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()  # key -> [last_used, count], od najstaršieho
+
+    def touch(self, key, when=None, count=1):
+        entry = self.items.pop(key, None)
+        if entry is None:
+            entry = [0, 0]
+        entry[0] = max(entry[0], when if when is not None else time.time())
+        entry[1] += count
+        self.items[key] = entry
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+    def recent(self, limit):
+        ranked = sorted(self.items.items(), key=lambda item: -item[1][0])
+        return [key for key, _ in ranked[:limit]]
+
+    def frequent(self, limit):
+        ranked = sorted(self.items.items(), key=lambda item: (-item[1][1], -item[1][0]))
+        return [key for key, _ in ranked[:limit]]
+
+
+class _UserUsage:
+    def __init__(self, size):
+        self.clients = _UsageList(size)
+        self.tasks = _UsageList(size)
+
+
+class RecentUsageTracker:
+    """MRU/MFU klienti a úkony pre používateľov, v pamäti procesu"""
+
+    def __init__(self, history_loader, size=RECENT_USAGE_SIZE):
+        # history_loader(user_id) vráti posledné záznamy používateľa ako
+        # dict-y s client_id, task_id, custom_task_name, start_time (od najnovšieho)
+        self._history_loader = history_loader
+        self._size = size
+        self._users = {}
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_user(self, user_id):
+        usage = self._users.get(user_id)
+        if usage is None:
+            usage = _UserUsage(self._size)
+            self._users[user_id] = usage
+        return usage
+
+    def _seed(self, user_id):
+        """Jednorazové naplnenie z histórie pri prvom prístupe k používateľovi"""
+        history = self._history_loader(user_id)
+        with self._lock:
+            if user_id in self._users:
+                return
+            usage = self._get_user(user_id)
+            # Od najstaršieho, aby poradie v OrderedDict zodpovedalo času
+            for row in reversed(history):
+                when = row['start_time'].timestamp() if row['start_time'] else None
+                usage.clients.touch(row['client_id'], when)
+                task_key = row['task_id'] or row['custom_task_name']
+                if task_key:
+                    usage.tasks.touch(task_key, when)
+
+    def record_start(self, user_id, client_id, record_id):
+        """Volané po úspešnom start_time_record"""
+        with self._lock:
+            self._pending[record_id] = user_id
+            while len(self._pending) > MAX_PENDING_RECORDS:
+                self._pending.popitem(last=False)
+
+            usage = self._users.get(user_id)
+            if usage is not None:
+                usage.clients.touch(client_id)
+
+    def record_end(self, record_id, task_id=None, custom_task_name=None):
+        """Volané po úspešnom end_time_record"""
+        with self._lock:
+            user_id = self._pending.pop(record_id, None)
+            task_key = task_id or custom_task_name
+            if user_id is None or not task_key:
+                return
+
+            usage = self._users.get(user_id)
+            if usage is not None:
+                usage.tasks.touch(task_key)
+
+    def record_cancel(self, record_id):
+        """Volané po zrušení časovača - záznam už nebude ukončený"""
+        with self._lock:
+            self._pending.pop(record_id, None)
+
+    def get(self, user_id, limit=5):
+        """Vráti {'clients': {'recent', 'frequent'}, 'tasks': {...}} so zoznamami kľúčov"""
+        if user_id not in self._users:
+            self._seed(user_id)
+
+        with self._lock:
+            usage = self._get_user(user_id)
+            return {
+                'clients': {
+                    'recent': usage.clients.recent(limit),
+                    'frequent': usage.clients.frequent(limit)
+                },
+                'tasks': {
+                    'recent': usage.tasks.recent(limit),
+                    'frequent': usage.tasks.frequent(limit)
+                }
+            }
@@ -0,0 +1,209 @@
+"""
+Cache výsledkov reportov po dňoch (get_warehouse_time_records)
+Uzavreté minulé dni sa nemenia - partície (sklad, deň) sa ukladajú komprimované
+na lokálny disk s LRU vyraďovaním, živo sa dopytuje len dnešok (podľa dátumu DB servera).
+Mazanie záznamov invaliduje presne dotknuté dni na disku tohto procesu; zmeny z iných
+inštancií sa prejavia najneskôr po REPORT_CACHE_TTL.
+"""
+
+import datetime
+import hashlib
+import os
+import pickle
+import threading
+import time
+import zlib
+
+# Cache je vypnutá, kým sa nenastaví adresár (napr. REPORT_CACHE_DIR=/var/cache/launchpad)
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', '')
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+# Dlhšie rozsahy idú priamo do DB (prvé načítanie by zaplnilo cache jedným reportom)
+REPORT_CACHE_MAX_DAYS = int(os.environ.get('REPORT_CACHE_MAX_DAYS', 400))
+# Životnosť partície v sekundách od uloženia (0 = bez obmedzenia)
+REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 3600))
+
+PARTITION_SUFFIX = '.day'
+
+
+def to_date(value):
+    """'2024-05-01' / date / datetime -> date"""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def day_range(first, last):
+    """Dni od first po last vrátane"""
+    days = []
+    day = first
+    while day <= last:
+        days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+class ReportDayCache:
+    """Partície (sklad, deň) na disku - riadky reportu ako tuple v poradí REPORT_COLUMNS"""
+
+    def __init__(self, directory=REPORT_CACHE_DIR, max_bytes=REPORT_CACHE_MAX_BYTES, ttl=REPORT_CACHE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._size = None  # celková veľkosť partícií, načíta sa lenivo
+        # Generácia skladu - zvýši sa pri invalidácii, put() so starou generáciou sa zahodí
+        # (report načítaný pred mazaním nesmie uložiť už zmazané riadky)
+        self._generations = {}
+        self._epoch = 0  # zvýši sa pri clear()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def _folder(self, warehouse):
+        # Názov skladu môže obsahovať čokoľvek - adresár podľa hash-u
+        return os.path.join(self.directory, hashlib.sha1(warehouse.encode()).hexdigest()[:16])
+
+    def _path(self, warehouse, day):
+        return os.path.join(self._folder(warehouse), day.isoformat() + PARTITION_SUFFIX)
+
+    def generation(self, warehouse):
+        """Aktuálna generácia skladu - zistiť pred dotazom, odovzdať do put()"""
+        with self._lock:
+            return self._epoch, self._generations.get(warehouse, 0)
+
+    def _bump(self, warehouse=None):
+        with self._lock:
+            if warehouse is None:
+                self._epoch += 1
+            else:
+                self._generations[warehouse] = self._generations.get(warehouse, 0) + 1
+            self._size = None
+
+    def _partitions(self, directory=None):
+        """[(cesta, veľkosť, mtime)] všetkých partícií na disku (alebo v adresári skladu)"""
+        partitions = []
+        for root, _, files in os.walk(directory or self.directory):
+            for name in files:
+                if not name.endswith(PARTITION_SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                partitions.append((path, stat.st_size, stat.st_mtime))
+        return partitions
+
+    def get(self, warehouse, day):
+        """Riadky dňa alebo None ak deň nie je v cache"""
+        path = self._path(warehouse, day)
+        try:
+            with open(path, 'rb') as f:
+                created, rows = pickle.loads(zlib.decompress(f.read()))
+            if self.ttl and time.time() - created > self.ttl:
+                self._remove(path)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # mtime = čas posledného použitia pre LRU (čas uloženia je v partícii)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, ValueError, TypeError) as e:
+            print(f"Chyba pri čítaní cache reportu {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return rows
+
+    def put(self, warehouse, day, rows, generation=None):
+        """Uloženie uzavretého dňa (nie ak sa sklad medzitým invalidoval)"""
+        if generation is not None and generation != self.generation(warehouse):
+            return
+        path = self._path(warehouse, day)
+        data = zlib.compress(pickle.dumps((time.time(), list(rows)), pickle.HIGHEST_PROTOCOL))
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Zápis cez dočasný súbor - súbežný čitateľ nevidí rozpísanú partíciu
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Chyba pri zápise cache reportu {path}: {e}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._partitions())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Vyradenie najdlhšie nepoužitých partícií pod 90 % limitu (volá sa pod zámkom)"""
+        partitions = sorted(self._partitions(), key=lambda partition: partition[2])
+        total = sum(size for _, size, _ in partitions)
+        target = self.max_bytes * 0.9
+        for path, size, _ in partitions:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+                self.evictions += 1
+        self._size = total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def invalidate(self, warehouse, days):
+        """Zahodenie partícií daných dní skladu (po mazaní záznamov)"""
+        self._bump(warehouse)
+        if not self.enabled:
+            return
+        for day in set(days):
+            if self._remove(self._path(warehouse, to_date(day))):
+                self.invalidations += 1
+
+    def invalidate_warehouse(self, warehouse):
+        """Zahodenie všetkých dní skladu (napr. po vymazaní používateľa)"""
+        self._bump(warehouse)
+        if not self.enabled:
+            return
+        for path, _, _ in self._partitions(self._folder(warehouse)):
+            if self._remove(path):
+                self.invalidations += 1
+
+    def clear(self):
+        self._bump()
+        for path, _, _ in self._partitions():
+            self._remove(path)
+
+    def metrics(self):
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl
+        }
@@ -0,0 +1,99 @@
+"""
+Kompaktné reprezentácie riadkov reportov (get_warehouse_time_records, get_all_time_records)
+Namiesto dict-u s 11 kľúčmi na riadok - namedtuple alebo stĺpcová dávka
+s internovanými opakujúcimi sa reťazcami
+"""
+
+import sys
+from collections import namedtuple
+
+from compact import rows_compact
+
+# Poradie stĺpcov zodpovedá SELECT-u v report metódach DatabaseManager
+REPORT_COLUMNS = (
+    'id',
+    'warehouse',
+    'username',
+    'full_name',
+    'client_name',
+    'task_name',
+    'custom_task_name',
+    'start_time',
+    'end_time',
+    'duration_seconds',
+    'description',
+)
+
+# Stĺpce s malým počtom rôznych hodnôt - internujú sa, aby každá hodnota existovala raz
+INTERNED_COLUMNS = ('warehouse', 'username', 'full_name', 'client_name', 'task_name')
+
+ROW_FORMATS = ('dict', 'tuple', 'columns')
+
+TimeRecordRow = namedtuple('TimeRecordRow', REPORT_COLUMNS)
+
+_INTERNED_INDEXES = tuple(REPORT_COLUMNS.index(column) for column in INTERNED_COLUMNS)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def intern_row(row):
+    """Tuple riadku s internovanými opakujúcimi sa reťazcami"""
+    row = list(row)
+    for index in _INTERNED_INDEXES:
+        row[index] = _intern(row[index])
+    return row
+
+
+class ReportColumns:
+    """Stĺpcová dávka riadkov reportu - jeden zoznam na stĺpec"""
+
+    __slots__ = REPORT_COLUMNS
+
+    def __init__(self, rows=()):
+        for column in REPORT_COLUMNS:
+            setattr(self, column, [])
+        self.extend(rows)
+
+    def extend(self, rows):
+        """Pridanie riadkov (tuple v poradí REPORT_COLUMNS)"""
+        columns = [getattr(self, column) for column in REPORT_COLUMNS]
+        interned = set(_INTERNED_INDEXES)
+        for row in rows:
+            for index, value in enumerate(row):
+                columns[index].append(_intern(value) if index in interned else value)
+
+    def __len__(self):
+        return len(self.id)
+
+    def row(self, index):
+        """Jeden riadok ako TimeRecordRow"""
+        return TimeRecordRow._make(getattr(self, column)[index] for column in REPORT_COLUMNS)
+
+    def __iter__(self):
+        return map(TimeRecordRow._make, zip(*(getattr(self, column) for column in REPORT_COLUMNS)))
+
+    def to_dict(self):
+        """Stĺpce ako {stĺpec: [hodnoty]} (napr. pre columnar JSON)"""
+        return {column: getattr(self, column) for column in REPORT_COLUMNS}
+
+
+def build_report_rows(rows, row_format):
+    """Riadky z kurzora (tuple) v požadovanom formáte ('tuple' alebo 'columns')"""
+    if row_format == 'columns':
+        return ReportColumns(rows)
+    return [TimeRecordRow._make(intern_row(row)) for row in rows]
+
+
+def report_rows_compact(records, fields=None, columnar=False):
+    """
+    Riadky reportu (tuple/TimeRecordRow/ReportColumns) pre JSON odpoveď - bez dict-u
+    z kurzora; datetime zakóduje JSON provider aplikácie
+    """
+    if isinstance(records, ReportColumns):
+        if columnar:
+            columns = records.to_dict()
+            return {field: columns[field] for field in fields if field in columns} if fields else columns
+        records = list(records)
+    return rows_compact(REPORT_COLUMNS, records, fields, columnar)
@@ -0,0 +1,363 @@
+"""
+Rozdelenie skladov do samostatných databáz (shardov)
+Každý sklad má všetky svoje dáta (users, clients, tasks, time_records) v jednom
+sharde; ShardRouter vyberie DatabaseManager podľa skladu.
+
+Konfigurácia:
+    DB_SHARDS='{"vychod": {"host": "db2", "database": "launchpad_vychod"}}'
+    DB_SHARD_MAP='Sklad Košice=vychod,Sklad Prešov=vychod'
+Sklady mimo mapy zostávajú v predvolenej databáze (DB_CONFIG).
+
+Migrácia skladu medzi shardmi:
+    python sharding.py migrate "Sklad Košice" default vychod [--delete-source]
+"""
+
+import copy
+import heapq
+import json
+import os
+import sys
+from operator import attrgetter, itemgetter
+
+from mysql.connector import Error
+
+from database import DatabaseManager, DB_CONFIG
+from report_rows import ReportColumns
+
+DEFAULT_SHARD = 'default'
+
+DB_SHARDS = json.loads(os.environ.get('DB_SHARDS', '{}'))
+DB_SHARD_MAP = os.environ.get('DB_SHARD_MAP', '')
+
+MIGRATION_BATCH_SIZE = 1000
+
+
+def parse_shard_map(value):
+    """'Sklad A=vychod,Sklad B=zapad' -> {'Sklad A': 'vychod', 'Sklad B': 'zapad'}"""
+    shard_map = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        warehouse, shard = item.rsplit('=', 1)
+        shard_map[warehouse.strip()] = shard.strip()
+    return shard_map
+
+
+class ShardRouter:
+    """Smerovanie volaní DatabaseManager do shardu podľa skladu"""
+
+    def __init__(self, shards=None, shard_map=None):
+        shards = DB_SHARDS if shards is None else shards
+        self.shard_map = parse_shard_map(DB_SHARD_MAP) if shard_map is None else shard_map
+
+        self.default = DatabaseManager()
+        self._managers = {DEFAULT_SHARD: self.default}
+        for name, config in shards.items():
+            self._managers[name] = DatabaseManager({**DB_CONFIG, **config})
+
+        unknown = set(self.shard_map.values()) - set(self._managers)
+        if unknown:
+            raise ValueError(f"DB_SHARD_MAP odkazuje na neznáme shardy: {', '.join(sorted(unknown))}")
+
+    def shard_name(self, warehouse):
+        return self.shard_map.get(warehouse, DEFAULT_SHARD)
+
+    def for_warehouse(self, warehouse):
+        """DatabaseManager shardu, v ktorom sú dáta skladu"""
+        return self._managers[self.shard_name(warehouse)]
+
+    def for_shard(self, name):
+        return self._managers[name]
+
+    def shard_names(self):
+        return list(self._managers)
+
+    def managers(self):
+        """Všetky shardy (pre fan-out volania a úlohy na pozadí)"""
+        return list(self._managers.values())
+
+    def worker_router(self):
+        """
+        Router pre vlákno na pozadí (žurnál, sweeper) - vlastné pripojenia do shardov,
+        ale in-memory stav (cache reportov, index klientov, živá tabuľa) zdieľaný s týmto
+        routerom, takže invalidácie z pozadia vidia aj requesty. Volá sa vo vlákne,
+        ktoré router používa - loadery zdieľaných cache v ňom pôjdu cez jeho pripojenia.
+        """
+        router = copy.copy(self)
+        router._managers = {}
+        for name, manager in self._managers.items():
+            router._managers[name] = manager.sharing_state()
+            manager.bind_loaders(router._managers[name])
+        router.default = router._managers[DEFAULT_SHARD]
+        return router
+
+    # ----------------------------------------
+    # Volania naprieč skladmi (fan-out)
+    # ----------------------------------------
+
+    def verify_user(self, username, password_hash):
+        """Prihlásenie - sklad ešte nepoznáme, skúsime shardy postupne"""
+        for manager in self.managers():
+            user = manager.verify_user(username, password_hash)
+            if user:
+                return user
+        return None
+
+    def get_all_time_records(self, start_date=None, end_date=None, row_format='dict'):
+        """Záznamy zo všetkých shardov zlúčené podľa start_time (od najnovšieho)"""
+        results = [
+            manager.get_all_time_records(start_date, end_date, row_format)
+            for manager in self.managers()
+        ]
+        if len(results) == 1:
+            return results[0]
+
+        if row_format == 'columns':
+            return ReportColumns(heapq.merge(*results, key=attrgetter('start_time'), reverse=True))
+
+        key = itemgetter('start_time') if row_format == 'dict' else attrgetter('start_time')
+        return list(heapq.merge(*results, key=key, reverse=True))
+
+    def apply_timer_events(self, events, id_map):
+        """Prenos udalostí write-behind žurnálu - každý shard vo vlastnej transakcii"""
+        by_shard = {}
+        for event in events:
+            by_shard.setdefault(self.shard_name(event.get('warehouse')), []).append(event)
+
+        # Prehranie je idempotentné, pri chybe sa celá dávka zopakuje
+        return all(
+            self._managers[name].apply_timer_events(shard_events, id_map)
+            for name, shard_events in by_shard.items()
+        )
+
+
+# ============================================
+# MIGRÁCIA SKLADU MEDZI SHARDMI
+# ============================================
+
+class MigrationError(Exception):
+    """Migráciu nemožno bezpečne dokončiť (nenamapované ID, rovnaký zdroj a cieľ...)"""
+
+
+def _existing_rows(target, query, params):
+    """Riadky skladu, ktoré už v cieli sú (z predošlého behu) - {kľúč: [id, ...]} podľa id"""
+    existing = {}
+    cursor = target.connection.cursor()
+    cursor.execute(query, params)
+    for row in cursor.fetchall():
+        existing.setdefault(tuple(row[1:]), []).append(row[0])
+    cursor.close()
+    for ids in existing.values():
+        ids.reverse()  # pop() vracia od najmenšieho id
+    return existing
+
+
+def _copy_rows(source, target, select_query, params, insert_query, convert, existing, key):
+    """
+    Kopírovanie riadkov po dávkach podľa id, vráti (mapa starých ID na nové, počet vložených).
+    convert(row) vráti parametre pre insert_query. Riadok, ktorého kľúč key(parametre)
+    už v cieli je (existing z _existing_rows), sa nevloží znova, len sa namapuje -
+    opakovaný alebo prerušený beh tak nevytvorí duplikáty.
+    """
+    id_map = {}
+    inserted = 0
+    after_id = 0
+    read = source.connection.cursor()
+    write = target.connection.cursor()
+
+    while True:
+        read.execute(select_query, tuple(params) + (after_id, MIGRATION_BATCH_SIZE))
+        rows = read.fetchall()
+        if not rows:
+            break
+
+        target.connection.start_transaction()
+        for row in rows:
+            values = convert(row)
+            matches = existing.get(key(values))
+            if matches:
+                id_map[row[0]] = matches.pop()
+                continue
+            write.execute(insert_query, values)
+            id_map[row[0]] = write.lastrowid
+            inserted += 1
+        target.connection.commit()
+
+        after_id = rows[-1][0]
+
+    read.close()
+    write.close()
+    return id_map, inserted
+
+
+def _mapped(id_map, value, what):
+    """Nové ID pre odkaz na iný riadok skladu; odkaz mimo migrovaných dát je chyba"""
+    if value is None:
+        return None
+    if value not in id_map:
+        raise MigrationError(f"{what} {value} nie je medzi migrovanými dátami skladu")
+    return id_map[value]
+
+
+def _delete_ids(db, table, ids):
+    """Vymazanie presne skopírovaných riadkov tabuľky po dávkach"""
+    ids = list(ids)
+    cursor = db.connection.cursor()
+    for offset in range(0, len(ids), MIGRATION_BATCH_SIZE):
+        chunk = ids[offset:offset + MIGRATION_BATCH_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", chunk)
+        db.connection.commit()
+    cursor.close()
+
+
+def migrate_warehouse(warehouse, source, target, delete_source=False):
+    """
+    Skopíruje všetky dáta skladu zo shardu source do target (ID sa prečíslujú).
+    Beh je idempotentný - riadky, ktoré už v cieli sú (z predošlého, aj prerušeného behu),
+    sa len namapujú. Odkaz na riadok mimo skladu (autor klienta, úkon záznamu...) migráciu
+    zastaví. Otvorené časovače skladu treba pred migráciou ukončiť. Po migrácii treba
+    upraviť DB_SHARD_MAP a reštartovať API.
+    """
+    if source is target or source.config == target.config:
+        raise MigrationError("Zdrojový a cieľový shard sú tá istá databáza")
+
+    source.ensure_connection()
+    target.ensure_connection()
+
+    users, users_inserted = _copy_rows(source, target, """
+        SELECT id, username, password_hash, full_name, warehouse, role, is_active, created_at
+        FROM users WHERE warehouse = %s AND id > %s ORDER BY id LIMIT %s
+        """, (warehouse,), """
+        INSERT INTO users (username, password_hash, full_name, warehouse, role, is_active, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, lambda row: row[1:],
+        _existing_rows(target, "SELECT id, username FROM users WHERE warehouse = %s ORDER BY id", (warehouse,)),
+        lambda values: (values[0],))
+
+    clients, clients_inserted = _copy_rows(source, target, """
+        SELECT id, client_name, warehouse, created_by, is_active
+        FROM clients WHERE warehouse = %s AND id > %s ORDER BY id LIMIT %s
+        """, (warehouse,), """
+        INSERT INTO clients (client_name, warehouse, created_by, is_active)
+        VALUES (%s, %s, %s, %s)
+        """, lambda row: (row[1], row[2], _mapped(users, row[3], 'Autor klienta'), row[4]),
+        _existing_rows(target, """
+        SELECT id, client_name, is_active FROM clients WHERE warehouse = %s ORDER BY id
+        """, (warehouse,)),
+        lambda values: (values[0], values[3]))
+
+    tasks, tasks_inserted = _copy_rows(source, target, """
+        SELECT id, task_name, warehouse, created_by, is_predefined, is_active, created_at
+        FROM tasks WHERE warehouse = %s AND id > %s ORDER BY id LIMIT %s
+        """, (warehouse,), """
+        INSERT INTO tasks (task_name, warehouse, created_by, is_predefined, is_active, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """, lambda row: (row[1], row[2], _mapped(users, row[3], 'Autor úkonu'), row[4], row[5], row[6]),
+        _existing_rows(target, """
+        SELECT id, task_name, is_predefined, is_active FROM tasks WHERE warehouse = %s ORDER BY id
+        """, (warehouse,)),
+        lambda values: (values[0], values[3], values[4]))
+
+    def convert_record(row):
+        return (
+            _mapped(users, row[1], f"Záznam {row[0]}: používateľ"),
+            _mapped(clients, row[2], f"Záznam {row[0]}: klient"),
+            _mapped(tasks, row[3], f"Záznam {row[0]}: úkon"),
+            row[4], row[5], row[6], row[7], row[8]
+        )
+
+    records, records_inserted = _copy_rows(source, target, """
+        SELECT tr.id, tr.user_id, tr.client_id, tr.task_id, tr.custom_task_name,
+               tr.start_time, tr.end_time, tr.duration_seconds, tr.description
+        FROM time_records tr
+        JOIN users u ON tr.user_id = u.id
+        WHERE u.warehouse = %s AND tr.id > %s ORDER BY tr.id LIMIT %s
+        """, (warehouse,), """
+        INSERT INTO time_records (user_id, client_id, task_id, custom_task_name,
+                                  start_time, end_time, duration_seconds, description)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, convert_record,
+        _existing_rows(target, """
+        SELECT tr.id, tr.user_id, tr.client_id, tr.start_time FROM time_records tr
+        JOIN users u ON tr.user_id = u.id
+        WHERE u.warehouse = %s ORDER BY tr.id
+        """, (warehouse,)),
+        lambda values: (values[0], values[1], values[4]))
+
+    summary = {
+        'users': len(users),
+        'clients': len(clients),
+        'tasks': len(tasks),
+        'time_records': len(records),
+        # Riadky vložené týmto behom (zvyšok už v cieli bol)
+        'inserted': {
+            'users': users_inserted,
+            'clients': clients_inserted,
+            'tasks': tasks_inserted,
+            'time_records': records_inserted
+        }
+    }
+
+    if delete_source:
+        summary.update(_delete_source(warehouse, source, users, clients, tasks, records))
+
+    return summary
+
+
+def _delete_source(warehouse, source, users, clients, tasks, records):
+    """Vymazanie skopírovaných dát zo zdroja - len ak na ne nič neskopírované neodkazuje"""
+    cursor = source.connection.cursor()
+    cursor.execute("""
+        SELECT tr.id FROM time_records tr
+        JOIN users u ON tr.user_id = u.id
+        LEFT JOIN clients c ON tr.client_id = c.id
+        WHERE u.warehouse = %s OR c.warehouse = %s
+        """, (warehouse, warehouse))
+    leftover = [row[0] for row in cursor.fetchall() if row[0] not in records]
+    cursor.close()
+    if leftover:
+        # Záznamy vzniknuté počas migrácie - používatelia a klienti skladu ešte nesmú zmiznúť
+        raise MigrationError(
+            f"Zdroj má {len(leftover)} neskopírovaných záznamov (napr. {leftover[0]}), "
+            "spusti migráciu znova a potom mazanie"
+        )
+
+    result = source.delete_time_records_chunked(list(records), warehouse)
+    if result['error']:
+        raise MigrationError(f"Mazanie záznamov zo zdroja zlyhalo: {result['error']}")
+
+    for table, id_map in (('tasks', tasks), ('clients', clients), ('users', users)):
+        _delete_ids(source, table, id_map)
+
+    return {'deleted_time_records': result['deleted']}
+
+
+def main(argv):
+    if len(argv) < 4 or argv[0] != 'migrate':
+        print('Použitie: python sharding.py migrate <sklad> <zdrojový_shard> <cieľový_shard> [--delete-source]')
+        return 2
+
+    warehouse, source_name, target_name = argv[1:4]
+    if source_name == target_name:
+        print("Zdrojový a cieľový shard musia byť rôzne")
+        return 2
+
+    router = ShardRouter()
+    try:
+        summary = migrate_warehouse(
+            warehouse,
+            router.for_shard(source_name),
+            router.for_shard(target_name),
+            delete_source='--delete-source' in argv
+        )
+    except (Error, KeyError, MigrationError) as e:
+        print(f"Migrácia zlyhala: {e}")
+        return 1
+
+    print(f"Migrácia skladu {warehouse}: {summary}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,84 @@
+"""
+Single-flight zlučovanie rovnakých súbežných čítaní
+Ak viac vlákien naraz volá tú istú metódu s rovnakými argumentmi, dotaz do DB
+vykoná len prvé z nich a ostatné dostanú jeho výsledok.
+"""
+
+import threading
+from functools import wraps
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Zdieľanie výsledku práve bežiaceho volania pre rovnaký kľúč"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}  # názov metódy -> {'calls', 'executions'}
+
+    def do(self, key, fn, name=None):
+        """Vykoná fn() alebo počká na výsledok už bežiaceho volania s rovnakým kľúčom"""
+        with self._lock:
+            stats = self._stats.setdefault(name, {'calls': 0, 'executions': 0})
+            stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                stats['executions'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def metrics(self):
+        """Počty volaní, skutočných vykonaní a coalescing ratio podľa metódy"""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+
+        for values in stats.values():
+            coalesced = values['calls'] - values['executions']
+            values['coalesced'] = coalesced
+            values['ratio'] = coalesced / values['calls'] if values['calls'] else 0.0
+        return stats
+
+
+def coalesced(method):
+    """
+    Dekorátor pre čítacie metódy DatabaseManager - súbežné volania s rovnakými
+    argumentmi zdieľajú jeden dotaz. Výsledok je zdieľaný objekt, volajúci ho nesmú meniť.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self.single_flight.do(key, lambda: method(self, *args, **kwargs), method.__name__)
+
+    return wrapper
@@ -0,0 +1,145 @@
+"""
+Sweeper zabudnutých časovačov
+Záznamy s end_time IS NULL otvorené dlhšie ako limit skladu sa v malých
+dávkach ukončia (close) alebo len nahlásia (flag) cez admin endpoint.
+"""
+
+import datetime
+import os
+import threading
+import time
+from collections import deque
+
+# Predvolený limit otvoreného časovača v hodinách a výnimky pre sklady
+# STALE_TIMER_LIMITS="Sklad A=10,Sklad B=16"
+STALE_TIMER_HOURS = float(os.environ.get('STALE_TIMER_HOURS', 12))
+STALE_TIMER_LIMITS = os.environ.get('STALE_TIMER_LIMITS', '')
+# close = ukončiť k start_time + limit, flag = len nahlásiť
+STALE_TIMER_ACTION = os.environ.get('STALE_TIMER_ACTION', 'close')
+# Interval behu na pozadí v sekundách - predvolene 0 = vypnuté, len manuálne cez API.
+# Beh na pozadí mení otvorené záznamy používateľov, preto ho treba zapnúť vedome.
+STALE_TIMER_SWEEP_INTERVAL = int(os.environ.get('STALE_TIMER_SWEEP_INTERVAL', 0))
+STALE_TIMER_BATCH_SIZE = int(os.environ.get('STALE_TIMER_BATCH_SIZE', 100))
+STALE_TIMER_MAX_BATCHES = int(os.environ.get('STALE_TIMER_MAX_BATCHES', 50))
+
+# Názov úkonu pre automaticky ukončené záznamy (ak nemali vlastný)
+STALE_TIMER_TASK_NAME = 'Automaticky ukončené'
+
+
+def parse_limits(value):
+    """'Sklad A=10,Sklad B=16' -> {'Sklad A': 36000, 'Sklad B': 57600} (sekundy)"""
+    limits = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        warehouse, hours = item.rsplit('=', 1)
+        limits[warehouse.strip()] = int(float(hours) * 3600)
+    return limits
+
+
+class StaleTimerSweeper:
+    """Periodické ukončovanie/hlásenie zabudnutých časovačov"""
+
+    def __init__(self, db_factory, default_hours=STALE_TIMER_HOURS, limits=STALE_TIMER_LIMITS,
+                 action=STALE_TIMER_ACTION, interval=STALE_TIMER_SWEEP_INTERVAL,
+                 batch_size=STALE_TIMER_BATCH_SIZE, max_batches=STALE_TIMER_MAX_BATCHES):
+        # db_factory() vráti zoznam DatabaseManager-ov (shardov) s vlastnými pripojeniami (volá sa vo vlákne sweepera)
+        self._db_factory = db_factory
+        self.default_limit = int(default_hours * 3600)
+        self.limits = parse_limits(limits)
+        self.action = action
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+
+        self._run_lock = threading.Lock()
+        self._worker = None
+        self.history = deque(maxlen=20)
+
+    def limit_for(self, warehouse):
+        """Limit otvoreného časovača pre sklad v sekundách"""
+        return self.limits.get(warehouse, self.default_limit)
+
+    def run(self, db, warehouse=None):
+        """Jeden beh sweepera (všetky sklady alebo jeden), vráti súhrn"""
+        with self._run_lock:
+            started_at = datetime.datetime.now()
+            # Najkratší limit - nad ním index (end_time, start_time) vyberie kandidátov
+            min_limit = self.limit_for(warehouse) if warehouse else min(
+                [self.default_limit] + list(self.limits.values())
+            )
+
+            found = []
+            closed = 0
+            after_id = 0
+            for _ in range(self.max_batches):
+                rows = db.get_stale_time_records(min_limit, after_id, self.batch_size, warehouse)
+                if not rows:
+                    break
+                after_id = rows[-1]['id']
+
+                stale = [row for row in rows if row['open_seconds'] > self.limit_for(row['warehouse'])]
+                found.extend(stale)
+
+                if self.action == 'close' and stale:
+                    # Krátka transakcia na dávku, skupiny podľa limitu skladu
+                    by_limit = {}
+                    for row in stale:
+                        by_limit.setdefault(self.limit_for(row['warehouse']), []).append(row['id'])
+                    for limit, record_ids in by_limit.items():
+                        closed += db.close_stale_time_records(record_ids, limit, STALE_TIMER_TASK_NAME)
+
+                if len(rows) < self.batch_size:
+                    break
+
+            summary = {
+                'started_at': started_at.isoformat(),
+                'finished_at': datetime.datetime.now().isoformat(),
+                'warehouse': warehouse,
+                'action': self.action,
+                'found': len(found),
+                'closed': closed,
+                'records': [
+                    {
+                        'record_id': row['id'],
+                        'warehouse': row['warehouse'],
+                        'user_id': row['user_id'],
+                        'start_time': row['start_time'].isoformat(),
+                        'open_seconds': row['open_seconds']
+                    }
+                    for row in found[:self.batch_size]
+                ]
+            }
+            self.history.appendleft(summary)
+            return summary
+
+    def start_worker(self):
+        """
+        Spustenie periodického behu na pozadí (ak je interval > 0). Volá ho len vstupný bod
+        servera (gunicorn.conf.py, ASGI lifespan, python api_server.py), nie import modulu.
+        """
+        if self.interval <= 0 or self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._loop, name='stale-timer-sweeper', daemon=True)
+        self._worker.start()
+
+    def _loop(self):
+        dbs = self._db_factory()
+        while True:
+            time.sleep(self.interval)
+            for db in dbs:
+                try:
+                    self.run(db)
+                except Exception as e:
+                    print(f"Chyba pri behu sweepera časovačov: {e}")
+
+    def status(self):
+        """Konfigurácia a posledné behy pre admin endpoint"""
+        return {
+            'action': self.action,
+            'interval_seconds': self.interval,
+            'worker_running': bool(self._worker and self._worker.is_alive()),
+            'default_limit_seconds': self.default_limit,
+            'warehouse_limits_seconds': self.limits,
+            'runs': list(self.history)
+        }
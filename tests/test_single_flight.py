@@ -0,0 +1,123 @@
+"""
+Testy single-flight zlučovania súbežných čítaní
+Spustenie: python -m pytest -q tests
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight, coalesced
+
+WAITERS = 8
+
+
+class Loader:
+    """Falošný DatabaseManager - dotaz čaká, kým ho test nepustí"""
+
+    def __init__(self, error=None):
+        self.single_flight = SingleFlight()
+        self.release = threading.Event()
+        self.executions = []
+        self.error = error
+        self._lock = threading.Lock()
+
+    @coalesced
+    def get_clients(self, warehouse):
+        with self._lock:
+            self.executions.append(warehouse)
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [warehouse]
+
+
+def run_concurrently(calls):
+    """Spustí volania vo vláknach, vráti výsledky alebo výnimky v poradí volaní"""
+    outcomes = [None] * len(calls)
+
+    def worker(index, fn):
+        try:
+            outcomes[index] = fn()
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i, fn)) for i, fn in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def wait_for_calls(loader, count, timeout=5):
+    """Počká, kým single-flight neeviduje count volaní (vedúce aj čakajúce)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = loader.single_flight.metrics().get('get_clients', {})
+        if stats.get('calls', 0) >= count:
+            return
+        time.sleep(0.005)
+    pytest.fail(f"volania nedobehli: {loader.single_flight.metrics()}")
+
+
+def finish(loader, threads):
+    loader.release.set()
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    loader = Loader()
+    threads, outcomes = run_concurrently([lambda: loader.get_clients('Sklad A')] * WAITERS)
+    wait_for_calls(loader, WAITERS)
+    finish(loader, threads)
+
+    assert loader.executions == ['Sklad A']
+    assert outcomes == [['Sklad A']] * WAITERS
+    # Všetci dostanú ten istý objekt
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+
+    stats = loader.single_flight.metrics()['get_clients']
+    assert stats['calls'] == WAITERS
+    assert stats['executions'] == 1
+    assert stats['coalesced'] == WAITERS - 1
+    assert stats['ratio'] == pytest.approx((WAITERS - 1) / WAITERS)
+
+
+def test_exception_is_raised_in_every_waiter():
+    error = RuntimeError('DB nedostupná')
+    loader = Loader(error=error)
+    threads, outcomes = run_concurrently([lambda: loader.get_clients('Sklad A')] * WAITERS)
+    wait_for_calls(loader, WAITERS)
+    finish(loader, threads)
+
+    assert loader.executions == ['Sklad A']
+    assert all(outcome is error for outcome in outcomes)
+
+
+def test_failed_call_is_not_remembered():
+    loader = Loader(error=RuntimeError('DB nedostupná'))
+    loader.release.set()
+    with pytest.raises(RuntimeError):
+        loader.get_clients('Sklad A')
+
+    loader.error = None
+    assert loader.get_clients('Sklad A') == ['Sklad A']
+    assert loader.executions == ['Sklad A', 'Sklad A']
+
+
+def test_different_arguments_are_not_coalesced():
+    loader = Loader()
+    warehouses = ['Sklad A', 'Sklad B', 'Sklad A', 'Sklad B']
+    threads, outcomes = run_concurrently([lambda w=w: loader.get_clients(w) for w in warehouses])
+    wait_for_calls(loader, len(warehouses))
+    finish(loader, threads)
+
+    assert sorted(loader.executions) == ['Sklad A', 'Sklad B']
+    assert outcomes == [[w] for w in warehouses]
+
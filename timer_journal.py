@@ -0,0 +1,406 @@
+"""
+Write-behind žurnál udalostí časovača
+Štart/stop/zrušenie časovača sa zapíše do lokálneho fsync-ovaného súboru
+a potvrdí hneď; do MySQL ho v dávkových transakciách prenesie worker na pozadí.
+
+Formát žurnálu: jeden JSON objekt na riadok (seq, type, time, warehouse, ...).
+Checkpoint (<žurnál>.state) drží poslednú prenesenú seq a mapu
+provizórnych ID záznamov (záporné čísla) na skutočné ID v databáze.
+Čas udalosti je podľa hodín API servera; pri prenose ho DatabaseManager
+posunie na hodiny DB (apply_timer_events).
+"""
+
+import datetime
+import json
+import os
+import threading
+import time
+import traceback
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows - zámok žurnálu nie je k dispozícii
+    fcntl = None
+
+TIMER_WRITE_BEHIND = os.environ.get('TIMER_WRITE_BEHIND', '0') == '1'
+TIMER_JOURNAL_PATH = os.environ.get('TIMER_JOURNAL_PATH', 'timer_journal.log')
+TIMER_JOURNAL_FLUSH_INTERVAL = float(os.environ.get('TIMER_JOURNAL_FLUSH_INTERVAL', 0.5))
+TIMER_JOURNAL_BATCH_SIZE = int(os.environ.get('TIMER_JOURNAL_BATCH_SIZE', 200))
+
+# Formát času udalostí - zodpovedá stĺpcom DATETIME v time_records
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+EVENT_TYPES = ('start', 'end', 'cancel')
+
+
+def _is_id(value, digits=False):
+    # digits=True pripustí aj číslo v reťazci ("123") - tak ID posielajú niektoré hodinky
+    if digits and isinstance(value, str):
+        return value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def invalid_event(event):
+    """Dôvod, prečo sa udalosť nedá preniesť do DB, alebo None ak je v poriadku"""
+    if event.get('type') not in EVENT_TYPES:
+        return f"neznámy typ {event.get('type')!r}"
+    if not _is_id(event.get('record_id')):
+        return f"record_id {event.get('record_id')!r} nie je celé číslo"
+    if event['type'] == 'start' and not (_is_id(event.get('user_id')) and _is_id(event.get('client_id'), True)):
+        return "user_id a client_id musia byť celé čísla"
+    try:
+        datetime.datetime.strptime(event.get('time') or '', TIME_FORMAT)
+    except (TypeError, ValueError):
+        return f"neplatný čas {event.get('time')!r}"
+    return None
+
+
+class TimerJournal:
+    """Lokálny žurnál udalostí časovača s prenosom do DB na pozadí"""
+
+    def __init__(self, path, db_factory, flush_interval=TIMER_JOURNAL_FLUSH_INTERVAL,
+                 batch_size=TIMER_JOURNAL_BATCH_SIZE, shard_of=None):
+        # db_factory() vytvorí DatabaseManager/ShardRouter s vlastným pripojením pre worker (volá sa vo vlákne workera)
+        # shard_of(sklad) - názov shardu; skutočné ID záznamov sú jedinečné len v rámci shardu
+        self.path = path
+        self._shard_of = shard_of or (lambda warehouse: warehouse)
+        self.state_path = path + '.state'
+        # Udalosti, ktoré sa nedajú preniesť (zlé dáta) - odložené mimo fronty
+        self.quarantine_path = path + '.quarantine'
+        self._db_factory = db_factory
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._worker = None
+
+        self._pending = deque()    # neprenesené udalosti v poradí seq
+        self._id_map = {}          # provizórne ID -> skutočné ID v DB
+        self._open = {}            # provizórne ID -> udalosť štartu (ešte nezatvorené)
+        self._closed = set()       # (shard, ID) zastavených/zrušených záznamov čakajúcich na prenos
+        self._next_seq = 1
+        self._flushed_seq = 0
+        # Po neočakávanej chybe dávky sa udalosti do tejto seq prenášajú po jednej
+        self._isolate_until = 0
+
+        # Metriky
+        self.flushed_total = 0
+        self.failed_flushes = 0
+        self.last_flush_at = None
+        self.last_error = None
+        self.last_error_message = None
+        self.quarantined = 0
+
+        self._lock_file = self._acquire_file_lock()
+        self._recover()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    # ----------------------------------------
+    # Zotavenie po páde
+    # ----------------------------------------
+
+    def _acquire_file_lock(self):
+        """Žurnál smie používať len jeden proces (napr. jeden gunicorn worker)"""
+        if fcntl is None:
+            return None
+        lock_file = open(self.path + '.lock', 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Žurnál {self.path} už používa iný proces")
+        return lock_file
+
+    def _recover(self):
+        """Načítanie checkpointu a neprenesených udalostí zo žurnálu"""
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self._flushed_seq = state['flushed_seq']
+            self._next_seq = state['next_seq']
+            self._id_map = {int(k): v for k, v in state['id_map'].items()}
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Neúplný posledný riadok po páde počas zápisu
+                    print(f"Žurnál časovača: preskočený poškodený riadok: {line[:80]!r}")
+                    continue
+                self._next_seq = max(self._next_seq, event['seq'] + 1)
+                if event['seq'] > self._flushed_seq:
+                    self._track(event)
+
+        if self._pending:
+            print(f"Žurnál časovača: obnovených {len(self._pending)} neprenesených udalostí")
+
+    def _track(self, event):
+        self._pending.append(event)
+        if event['type'] == 'start':
+            self._open[event['record_id']] = event
+        else:
+            self._open.pop(event['record_id'], None)
+            self._closed.add(self._closed_key(event))
+
+    def _closed_key(self, event):
+        return self._shard_of(event.get('warehouse')), event['record_id']
+
+    # ----------------------------------------
+    # Zápis udalostí (request path)
+    # ----------------------------------------
+
+    def _append(self, event_type, **fields):
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            event = {
+                'seq': seq,
+                'type': event_type,
+                'time': datetime.datetime.now().strftime(TIME_FORMAT),
+                **fields
+            }
+            if event_type == 'start':
+                event['record_id'] = -seq
+
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            self._track(event)
+        self._wakeup.set()
+        return event
+
+    def start(self, user_id, client_id, description="", warehouse=None):
+        """Štart časovača - vráti provizórne (záporné) ID záznamu"""
+        event = self._append('start', user_id=user_id, client_id=client_id,
+                             description=description, warehouse=warehouse)
+        return event['record_id']
+
+    def end(self, record_id, task_id=None, custom_task_name=None, warehouse=None):
+        """Zastavenie časovača s voliteľným úkonom"""
+        self._append('end', record_id=record_id, task_id=task_id,
+                     custom_task_name=custom_task_name, warehouse=warehouse)
+        return True
+
+    def cancel(self, record_id, warehouse=None):
+        """Zrušenie časovača"""
+        self._append('cancel', record_id=record_id, warehouse=warehouse)
+        return True
+
+    # ----------------------------------------
+    # Pohľad na neprenesené udalosti
+    # ----------------------------------------
+
+    def pending_active(self, user_id, warehouse=None):
+        """Posledný neprenesený a nezatvorený štart používateľa (alebo None)"""
+        # user_id je jedinečné len v rámci shardu, preto aj sklad
+        with self._lock:
+            starts = [
+                event for event in self._open.values()
+                if event['user_id'] == user_id and event.get('warehouse') == warehouse
+            ]
+            return dict(starts[-1]) if starts else None
+
+    def pending_open(self, warehouse=None):
+        """Všetky neprenesené a nezatvorené štarty skladu"""
+        with self._lock:
+            return [dict(event) for event in self._open.values() if event.get('warehouse') == warehouse]
+
+    def is_closed(self, record_id, warehouse=None):
+        """Či je záznam skladu zastavený/zrušený v žurnáli, ale ešte nie v DB"""
+        shard = self._shard_of(warehouse)
+        with self._lock:
+            if (shard, record_id) in self._closed:
+                return True
+            # Stop s provizórnym ID - to isté skutočné ID môže mať záznam iného shardu
+            provisional = [p for p, real in self._id_map.items() if real == record_id]
+            return any((shard, p) in self._closed for p in provisional)
+
+    def metrics(self):
+        """Hĺbka fronty, oneskorenie a štatistiky prenosu"""
+        with self._lock:
+            depth = len(self._pending)
+            oldest = self._pending[0]['time'] if depth else None
+        lag = 0.0
+        if oldest:
+            oldest_at = datetime.datetime.strptime(oldest, TIME_FORMAT)
+            lag = max(0.0, (datetime.datetime.now() - oldest_at).total_seconds())
+        return {
+            'worker_alive': bool(self._worker and self._worker.is_alive()),
+            'queue_depth': depth,
+            'lag_seconds': lag,
+            'flushed_total': self.flushed_total,
+            'failed_flushes': self.failed_flushes,
+            'quarantined': self.quarantined,
+            'last_flush_at': self.last_flush_at,
+            'last_error': self.last_error,
+            'last_error_message': self.last_error_message
+        }
+
+    # ----------------------------------------
+    # Prenos do databázy (worker)
+    # ----------------------------------------
+
+    def start_worker(self):
+        """Spustenie workera na pozadí"""
+        self._worker = threading.Thread(target=self._run, name='timer-journal', daemon=True)
+        self._worker.start()
+
+    def stop_worker(self, timeout=10):
+        """Zastavenie workera po prenesení čakajúcich udalostí"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout)
+
+    def _run(self):
+        db = None
+        while True:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            # Worker nesmie skončiť na chybe - žurnál by rástol bez prenosu
+            try:
+                if db is None:
+                    db = self._db_factory()
+                while self._pending:
+                    if not self.flush(db):
+                        # DB nedostupná - skúsime znova po intervale
+                        break
+            except Exception as e:
+                self._error(e)
+                traceback.print_exc()
+                time.sleep(self._flush_interval)
+            if self._stopping:
+                return
+
+    def _error(self, error):
+        self.last_error = datetime.datetime.now().strftime(TIME_FORMAT)
+        self.last_error_message = str(error) if isinstance(error, Exception) else error
+
+    def flush(self, db):
+        """Prenesie jednu dávku udalostí v jednej transakcii, vráti True pri úspechu"""
+        with self._lock:
+            size = min(self._batch_size, len(self._pending))
+            if self._pending and self._pending[0]['seq'] <= self._isolate_until:
+                size = 1
+            batch = [self._pending[i] for i in range(size)]
+            id_map = dict(self._id_map)
+        if not batch:
+            return True
+
+        # Dávka končí pred prvou chybnou udalosťou, tá sa odloží, keď príde na rad
+        for index, event in enumerate(batch):
+            reason = invalid_event(event)
+            if reason:
+                if index == 0:
+                    self._quarantine(event, reason)
+                    return True
+                batch = batch[:index]
+                break
+
+        try:
+            applied = db.apply_timer_events(batch, id_map)
+        except Exception as e:
+            print(f"Žurnál časovača: neočakávaná chyba pri prenose dávky (seq {batch[0]['seq']}-{batch[-1]['seq']}): {e}")
+            traceback.print_exc()
+            self.failed_flushes += 1
+            self._error(e)
+            if len(batch) == 1:
+                # Chybná je práve táto udalosť - odloží sa, ostatné pokračujú
+                self._quarantine(batch[0], str(e))
+            else:
+                # Chybnú udalosť dávky nájdeme prenosom po jednej
+                self._isolate_until = batch[-1]['seq']
+            return True
+
+        if not applied:
+            self.failed_flushes += 1
+            self._error('Databáza nie je dostupná')
+            time.sleep(self._flush_interval)
+            return False
+
+        with self._lock:
+            self._done(batch, id_map)
+
+        self.flushed_total += len(batch)
+        self.last_flush_at = datetime.datetime.now().strftime(TIME_FORMAT)
+        return True
+
+    def _done(self, events, id_map):
+        """Odstránenie prenesených (alebo odložených) udalostí z čela fronty (pod zámkom)"""
+        for event in events:
+            self._pending.popleft()
+            if event['type'] == 'start':
+                self._open.pop(event['record_id'], None)
+            else:
+                self._closed.discard(self._closed_key(event))
+                # Zatvorený záznam už nikto neadresuje provizórnym ID
+                if _is_id(event['record_id']) and event['record_id'] < 0 \
+                        and not self._is_referenced(event['record_id']):
+                    id_map.pop(event['record_id'], None)
+        self._id_map = id_map
+        self._flushed_seq = events[-1]['seq']
+        self._write_checkpoint()
+        if not self._pending:
+            self._truncate()
+
+    def _quarantine(self, event, reason):
+        """Odloženie udalosti, ktorá sa nedá preniesť, do <žurnál>.quarantine"""
+        print(f"Žurnál časovača: udalosť seq {event.get('seq')} odložená do karantény: {reason}")
+        with self._lock:
+            if not self._pending or self._pending[0] is not event:
+                return
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({**event, 'error': reason}, ensure_ascii=False, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._done([event], dict(self._id_map))
+        self.quarantined += 1
+        self._error(f"seq {event.get('seq')}: {reason}")
+
+    def _is_referenced(self, record_id):
+        return any(event['record_id'] == record_id for event in self._pending)
+
+    def _write_checkpoint(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'flushed_seq': self._flushed_seq,
+                'next_seq': self._next_seq,
+                'id_map': self._id_map
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def _truncate(self):
+        """Všetko prenesené - žurnál sa môže vyprázdniť (seq pokračuje z checkpointu)"""
+        self._file.truncate(0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def create_timer_journal(db_factory, shard_of=None):
+    """
+    Žurnál podľa TIMER_WRITE_BEHIND, alebo None ak je write-behind vypnutý.
+    Ak je zapnutý a žurnál sa nedá otvoriť (napr. ho drží iný proces), proces sa nespustí -
+    pri zmiešanom režime by stop s provizórnym ID v inom procese nič neukončil.
+    """
+    if not TIMER_WRITE_BEHIND:
+        return None
+    try:
+        journal = TimerJournal(TIMER_JOURNAL_PATH, db_factory, shard_of=shard_of)
+    except (OSError, RuntimeError) as e:
+        raise RuntimeError(
+            f"TIMER_WRITE_BEHIND=1, ale žurnál nie je k dispozícii: {e}. "
+            "Write-behind vyžaduje jeden proces servera (gunicorn --workers 1, uvicorn bez --workers)."
+        ) from e
+    journal.start_worker()
+    return journal
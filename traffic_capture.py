@@ -0,0 +1,159 @@
+"""
+Zachytávanie produkčnej prevádzky pre replay (traffic_replay.py)
+Po zapnutí (TRAFFIC_CAPTURE_PATH) sa každý request zapíše ako jeden JSON riadok:
+čas začiatku, metóda, route, hash používateľa a skladu, query parametre,
+anonymizované JSON telo, status, trvanie a veľkosť odpovede.
+
+Heslá, tokeny ani texty zadané používateľom sa nezapisujú - reťazce v tele
+a v query parametroch mimo PLAIN_ARGS sa nahradia dĺžkou, používateľ a sklad
+len solenými hash-mi.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from flask import g, request
+
+# Prázdna cesta = zachytávanie vypnuté
+TRAFFIC_CAPTURE_PATH = os.environ.get('TRAFFIC_CAPTURE_PATH', '')
+# Podiel zachytených requestov (1 = všetky)
+TRAFFIC_CAPTURE_SAMPLE = float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE', 1))
+# Soľ hash-ov - rovnaká soľ na všetkých inštanciách spojí používateľov naprieč trace-mi
+TRAFFIC_CAPTURE_SALT = os.environ.get('TRAFFIC_CAPTURE_SALT', '') or os.urandom(16).hex()
+
+# Endpointy, ktorých telo sa nezapisuje vôbec (heslá, importované dáta)
+SKIPPED_BODIES = ('login', 'bulk_import')
+SENSITIVE_KEYS = ('password', 'token')
+# Query parametre bez textu od používateľa - zapisujú sa celé, ostatné (napr. q
+# z /api/clients/search) prejdú cez sanitize ako telo
+PLAIN_ARGS = ('fields', 'format', 'limit', 'start_date', 'end_date', 'catalog_version')
+
+
+def hash_value(value, salt=TRAFFIC_CAPTURE_SALT):
+    if value is None:
+        return None
+    return hashlib.sha256(f"{salt}\0{value}".encode()).hexdigest()[:16]
+
+
+def sanitize(value):
+    """Čísla a bool ostávajú (ID klientov, úkonov), reťazce sa nahradia dĺžkou"""
+    if isinstance(value, dict):
+        return {
+            key: sanitize(item)
+            for key, item in value.items()
+            if key.lower() not in SENSITIVE_KEYS
+        }
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    if isinstance(value, str):
+        return {'$str': len(value)}
+    return value
+
+
+class TrafficCapture:
+    """Flask before/after_request hooky zapisujúce trace do JSONL súboru"""
+
+    def __init__(self, path, sample=TRAFFIC_CAPTURE_SAMPLE, salt=TRAFFIC_CAPTURE_SALT):
+        self.path = path
+        self.sample = sample
+        self.salt = salt
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self.captured = 0
+
+    def install(self, app):
+        """Registrácia hookov - volať pred ostatnými before_request (meria aj admission)"""
+        app.before_request(self._before)
+        app.after_request(self._after)
+
+    def start(self):
+        """Začiatok requestu (time, perf_counter) alebo None ak request nie je vo vzorke"""
+        if self.sample >= 1 or random.random() < self.sample:
+            return time.time(), time.perf_counter()
+        return None
+
+    def _before(self):
+        g.capture_start = self.start()
+
+    def _after(self, response):
+        start = g.pop('capture_start', None)
+        if start is None:
+            return response
+
+        data = None
+        if request.endpoint not in SKIPPED_BODIES and request.is_json:
+            data = request.get_json(silent=True)
+
+        self.write(
+            start, request.method, request.url_rule.rule if request.url_rule else None,
+            request.path, request.endpoint, g.get('current_user'), request.args.items(), data,
+            response.status_code, response.calculate_content_length(), self._record_id(response)
+        )
+        return response
+
+    def write(self, start, method, route, path, endpoint, current_user, args, data,
+              status, response_size, record_id=None):
+        """Zápis jedného requestu - z Flask hookov aj z async handlerov asgi_server"""
+        started_at, start = start
+        duration = time.perf_counter() - start
+        current_user = current_user or {}
+
+        record = {
+            # Absolútny čas - trace z viacerých workerov sa zlúči podľa neho
+            'ts': round(started_at, 4),
+            'method': method,
+            'route': route,
+            'path': path,
+            'endpoint': endpoint,
+            'user': hash_value(current_user.get('username'), self.salt),
+            'warehouse': hash_value(current_user.get('warehouse'), self.salt),
+            'role': current_user.get('role'),
+            'args': {
+                key: value if key in PLAIN_ARGS else sanitize(value)
+                for key, value in args
+                if key.lower() not in SENSITIVE_KEYS
+            },
+            'body': sanitize(data) if data is not None and endpoint not in SKIPPED_BODIES else None,
+            'status': status,
+            'duration_ms': round(duration * 1000, 3),
+            'response_size': response_size,
+            # ID vytvoreného záznamu - replay podľa neho spojí štart s neskorším stop/cancel
+            'record_id': record_id
+        }
+        line = json.dumps(record, ensure_ascii=False)
+
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            self.captured += 1
+
+    @staticmethod
+    def _record_id(response):
+        if request.endpoint != 'start_timer' or response.status_code != 200:
+            return None
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return None
+        data = response.get_json(silent=True)
+        return data.get('record_id') if data else None
+
+    def metrics(self):
+        return {
+            'path': self.path,
+            'sample': self.sample,
+            'captured': self.captured
+        }
+
+
+def create_traffic_capture():
+    """TrafficCapture podľa TRAFFIC_CAPTURE_PATH, alebo None ak je zachytávanie vypnuté"""
+    if not TRAFFIC_CAPTURE_PATH:
+        return None
+    try:
+        return TrafficCapture(TRAFFIC_CAPTURE_PATH)
+    except OSError as e:
+        print(f"Zachytávanie prevádzky nie je k dispozícii: {e}")
+        return None
@@ -0,0 +1,414 @@
+"""
+Deterministický replay zachytenej prevádzky (traffic_capture.py) proti lokálnej inštancii
+
+    python traffic_replay.py replay trace.jsonl http://127.0.0.1:5000 --users users.csv \\
+        [--speed 1|10|0] [--out results.jsonl]
+    python traffic_replay.py compare results_a.jsonl results_b.jsonl
+
+users.csv (username,warehouse,role[,password]) popisuje používateľov naplnenej databázy.
+Hash-e skladov a používateľov z trace sa na nich mapujú stabilne v poradí výskytu,
+ID klientov a úkonov na ID zo /api/clients a /api/tasks cieľového servera - všetky
+tieto mapovania sa zostavia jedným prechodom cez trace zoradený podľa ts ešte pred
+replayom, takže dva replaye toho istého trace posielajú to isté.
+ID záznamov z /api/timer/start sa mapujú na ID vrátené pri replayi. Requesty jedného
+používateľa idú po jednom v pôvodnom poradí (ako z hodiniek), rôzni používatelia súbežne.
+--speed 1 = pôvodné tempo, 10 = desaťkrát rýchlejšie, 0 = bez čakania.
+SECRET_KEY musí byť rovnaký ako na cieľovom serveri (tokeny sa vystavujú lokálne).
+"""
+
+import argparse
+import asyncio
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+import jwt
+
+# Endpointy, ktorých telo obsahuje ID klienta/úkonu/záznamu z produkčnej DB
+ID_FIELDS = {
+    'client_id': 'clients',
+    'task_id': 'tasks',
+}
+
+
+def load_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_users(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return [
+            {
+                'username': row['username'],
+                'warehouse': row['warehouse'],
+                'role': row.get('role') or 'user',
+                'password': row.get('password')
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def make_token(user):
+    return jwt.encode({
+        'username': user['username'],
+        'warehouse': user['warehouse'],
+        'role': user['role'],
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(days=1)
+    }, os.environ.get('SECRET_KEY', 'default-secret-key'), algorithm="HS256")
+
+
+def desanitize(value):
+    """{'$str': n} z traffic_capture.sanitize -> reťazec dĺžky n"""
+    if isinstance(value, dict):
+        if set(value) == {'$str'}:
+            return 'x' * value['$str']
+        return {key: desanitize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [desanitize(item) for item in value]
+    return value
+
+
+class StableMap:
+    """Mapovanie hodnôt z trace na cieľové hodnoty v poradí výskytu (round-robin)"""
+
+    def __init__(self, targets):
+        self.targets = list(targets)
+        self.mapping = {}
+
+    def get(self, key):
+        if key not in self.mapping:
+            if not self.targets:
+                return None
+            self.mapping[key] = self.targets[len(self.mapping) % len(self.targets)]
+        return self.mapping[key]
+
+# ============================================
+# HTTP KLIENT (keep-alive spojenie na používateľa)
+# ============================================
+
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, headers, body=None):
+        """Vráti (status, telo); pri zatvorenom spojení sa raz pripojí znova"""
+        data = json.dumps(body).encode() if body is not None else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(data)}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode() + data
+
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(raw)
+                await self.writer.drain()
+                return await self._read_response()
+            except (OSError, asyncio.IncompleteReadError):
+                self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        length = None
+        chunked = False
+        close = False
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name = name.lower()
+            value = value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding':
+                chunked = value.endswith('chunked')
+            elif name == 'connection' and value == 'close':
+                close = True
+
+        if chunked:
+            body = await self._read_chunked()
+        elif length is not None:
+            body = await self.reader.readexactly(length)
+        elif close:
+            # Telo bez dĺžky končí zatvorením spojenia
+            body = await self.reader.read()
+        else:
+            body = b''
+        if close:
+            self.close()
+        return status, body
+
+    async def _read_chunked(self):
+        """Telo v Transfer-Encoding: chunked (napr. streamované odpovede, proxy)"""
+        chunks = []
+        while True:
+            size_line = await self.reader.readuntil(b'\r\n')
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # Trailer hlavičky až po prázdny riadok
+        while await self.reader.readuntil(b'\r\n') != b'\r\n':
+            pass
+        return b''.join(chunks)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+# ============================================
+# REPLAY
+# ============================================
+
+class Replay:
+    def __init__(self, trace, url, users, speed):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.trace = sorted(trace, key=lambda record: record['ts'])
+        self.speed = speed
+
+        # Sklady a používatelia z trace -> používatelia naplnenej DB
+        warehouses = sorted({user['warehouse'] for user in users})
+        self.warehouse_map = StableMap(warehouses)
+        self.user_maps = {}
+        self.users_by_warehouse = {}
+        for user in users:
+            self.users_by_warehouse.setdefault((user['warehouse'], user['role'] == 'admin'), []).append(user)
+        self.anonymous = StableMap(users)
+
+        self.id_maps = {}      # (sklad, 'clients'/'tasks') -> StableMap
+        self.record_ids = {}   # ID záznamu z trace -> ID z replay-u
+        self.results = []
+        self.skipped = 0
+
+    def user_for(self, record):
+        """Cieľový používateľ pre request z trace (None = request bez prihlásenia)"""
+        if not record.get('user'):
+            return None
+        warehouse = self.warehouse_map.get(record['warehouse'])
+        is_admin = record.get('role') == 'admin'
+        key = (warehouse, is_admin)
+        if key not in self.user_maps:
+            candidates = self.users_by_warehouse.get(key) or self.users_by_warehouse.get((warehouse, not is_admin), [])
+            self.user_maps[key] = StableMap(candidates)
+        return self.user_maps[key].get(record['user'])
+
+    async def load_ids(self, user):
+        """ID klientov a úkonov skladu používateľa z cieľového servera"""
+        connection = Connection(self.host, self.port)
+        headers = {'Authorization': f"Bearer {make_token(user)}"}
+        for kind in ('clients', 'tasks'):
+            status, body = await connection.request('GET', f"/api/{kind}?fields=id", headers)
+            items = json.loads(body).get(kind, []) if status == 200 else []
+            self.id_maps[(user['warehouse'], kind)] = StableMap(sorted(item['id'] for item in items))
+        connection.close()
+
+    def prepare_body(self, record, user):
+        """Telo requestu s ID klientov a úkonov cieľového servera (ID záznamu až pri odoslaní)"""
+        if record.get('endpoint') == 'login':
+            login_user = self.anonymous.get(record['ts'])
+            if not login_user or not login_user.get('password'):
+                return None, False
+            return {'username': login_user['username'], 'password': login_user['password']}, True
+
+        body = desanitize(record.get('body'))
+        if isinstance(body, dict):
+            for field, kind in ID_FIELDS.items():
+                if body.get(field) is not None and user:
+                    body[field] = self.id_maps[(user['warehouse'], kind)].get(body[field])
+        return body, True
+
+    async def prepare(self):
+        """
+        Mapovania skladov, používateľov, ID klientov/úkonov a prihlásení jedným prechodom
+        cez trace (zoradený podľa ts) pred replayom. Pri súbežnom replayi by záviseli od toho,
+        ktorý používateľ sa dostane na rad skôr. Vráti [(používateľ, [(record, telo)])],
+        requesty každého používateľa v pôvodnom poradí.
+        """
+        by_user = {}
+        for index, record in enumerate(self.trace):
+            key = record.get('user') and (record['warehouse'], record['user'], record.get('role'))
+            key = key or ('anonymous', index)
+            if key not in by_user:
+                user = self.user_for(record)
+                if user and (user['warehouse'], 'clients') not in self.id_maps:
+                    await self.load_ids(user)
+                by_user[key] = (user, [])
+
+            user, records = by_user[key]
+            body, ok = self.prepare_body(record, user)
+            if not ok:
+                self.skipped += 1
+                continue
+            records.append((record, body))
+        return [(user, records) for user, records in by_user.values() if records]
+
+    async def run_user(self, records, user, started):
+        connection = Connection(self.host, self.port)
+        headers = {}
+        if user:
+            headers['Authorization'] = f"Bearer {make_token(user)}"
+
+        first_ts = self.trace[0]['ts']
+        for record, body in records:
+            if self.speed:
+                delay = (record['ts'] - first_ts) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if isinstance(body, dict) and body.get('record_id') is not None:
+                body['record_id'] = self.record_ids.get(body['record_id'], body['record_id'])
+
+            path = record['path']
+            if record.get('args'):
+                path += '?' + urlencode(desanitize(record['args']))
+
+            start = time.perf_counter()
+            try:
+                status, data = await connection.request(record['method'], path, headers, body)
+            except (OSError, asyncio.IncompleteReadError):
+                status, data = None, b''
+            latency = time.perf_counter() - start
+
+            if record.get('record_id') is not None and status == 200:
+                self.record_ids[record['record_id']] = json.loads(data).get('record_id')
+
+            self.results.append({
+                'ts': record['ts'],
+                'route': f"{record['method']} {record.get('route') or record['path']}",
+                'status': status,
+                'expected_status': record['status'],
+                'latency_ms': round(latency * 1000, 3),
+                'size': len(data)
+            })
+        connection.close()
+
+    async def run(self):
+        # Poradie requestov jedného používateľa je zachované, používatelia idú súbežne
+        prepared = await self.prepare()
+
+        started = time.monotonic()
+        await asyncio.gather(*(
+            self.run_user(records, user, started)
+            for user, records in prepared
+        ))
+        return time.monotonic() - started
+
+# ============================================
+# ŠTATISTIKY
+# ============================================
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(results):
+    """route -> {'count', 'errors', 'mismatched', 'p50', 'p95', 'p99'}"""
+    by_route = {}
+    for result in results:
+        by_route.setdefault(result['route'], []).append(result)
+    by_route['(všetky)'] = list(results)
+
+    summary = {}
+    for route, items in by_route.items():
+        latencies = sorted(item['latency_ms'] for item in items)
+        summary[route] = {
+            'count': len(items),
+            'errors': sum(1 for item in items if item['status'] is None or item['status'] >= 500),
+            'mismatched': sum(1 for item in items if item['status'] != item['expected_status']),
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99)
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'route':<45} {'počet':>7} {'chyby':>6} {'iný status':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in sorted(summary.items()):
+        print(f"{route:<45} {stats['count']:>7} {stats['errors']:>6} {stats['mismatched']:>10} "
+              f"{stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+
+
+def compare(path_a, path_b):
+    """Porovnanie rozdelenia latencií dvoch replay-ov (napr. dvoch buildov)"""
+    a = summarize(load_jsonl(path_a))
+    b = summarize(load_jsonl(path_b))
+
+    def delta(old, new):
+        return f"{(new - old) / old * 100:+.0f} %" if old else '-'
+
+    print(f"A = {path_a}\nB = {path_b}")
+    print(f"{'route':<45} {'počet':>7} {'p50 A':>8} {'p50 B':>8} {'Δ':>7} {'p95 A':>8} {'p95 B':>8} {'Δ':>7} "
+          f"{'p99 A':>8} {'p99 B':>8} {'Δ':>7}")
+    for route in sorted(set(a) | set(b)):
+        old = a.get(route)
+        new = b.get(route)
+        if not old or not new:
+            print(f"{route:<45} len v {'A' if old else 'B'}")
+            continue
+        print(f"{route:<45} {new['count']:>7} "
+              f"{old['p50']:>8.1f} {new['p50']:>8.1f} {delta(old['p50'], new['p50']):>7} "
+              f"{old['p95']:>8.1f} {new['p95']:>8.1f} {delta(old['p95'], new['p95']):>7} "
+              f"{old['p99']:>8.1f} {new['p99']:>8.1f} {delta(old['p99'], new['p99']):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay zachytenej prevádzky')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    replay = commands.add_parser('replay')
+    replay.add_argument('trace')
+    replay.add_argument('url')
+    replay.add_argument('--users', required=True, help='CSV username,warehouse,role[,password]')
+    replay.add_argument('--speed', type=float, default=1.0, help='1 = pôvodné tempo, 0 = bez čakania')
+    replay.add_argument('--out', default='replay_results.jsonl')
+
+    diff = commands.add_parser('compare')
+    diff.add_argument('results_a')
+    diff.add_argument('results_b')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        compare(args.results_a, args.results_b)
+        return 0
+
+    trace = load_jsonl(args.trace)
+    if not trace:
+        print("Trace je prázdny")
+        return 1
+
+    runner = Replay(trace, args.url, load_users(args.users), args.speed)
+    elapsed = asyncio.run(runner.run())
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        for result in sorted(runner.results, key=lambda result: result['ts']):
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    print(f"Prehraných {len(runner.results)} requestov za {elapsed:.1f} s, preskočených {runner.skipped}"
+          f" -> {args.out}")
+    print_summary(summarize(runner.results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())